@@ -0,0 +1,122 @@
+"""
+Numba-compiled search kernels for the NumPy backend.
+
+Importing this module requires numba; indexer.py treats it as an optional
+dependency and falls back to BLAS when it is missing.
+"""
+
+import numpy as np
+from numba import njit, prange, get_num_threads
+
+# Embedding dimension with a dedicated, fully unrolled kernel (see EMBEDDING_DIMENSION)
+KERNEL_DIM = 768
+
+
+@njit(cache=True)
+def _push_top_k(out_idx, out_score, chunk, doc, score):
+    """Insert (doc, score) into a chunk's top-k, kept sorted by descending score."""
+    top_k = out_score.shape[1]
+    if score <= out_score[chunk, top_k - 1]:
+        return
+    j = top_k - 1
+    while j > 0 and out_score[chunk, j - 1] < score:
+        out_score[chunk, j] = out_score[chunk, j - 1]
+        out_idx[chunk, j] = out_idx[chunk, j - 1]
+        j -= 1
+    out_score[chunk, j] = score
+    out_idx[chunk, j] = doc
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _topk_dot_768_chunks(embeddings, query, top_k, num_chunks):
+    """Per-chunk top-k of embeddings @ query, each chunk sorted by descending score."""
+    num_docs = embeddings.shape[0]
+    chunk_size = (num_docs + num_chunks - 1) // num_chunks
+    out_idx = np.full((num_chunks, top_k), -1, dtype=np.int64)
+    out_score = np.full((num_chunks, top_k), -np.inf, dtype=np.float32)
+
+    for chunk in prange(num_chunks):
+        start = chunk * chunk_size
+        stop = min(start + chunk_size, num_docs)
+        for i in range(start, stop):
+            # Constant trip count: LLVM unrolls and vectorizes into wide FMAs
+            s = np.float32(0.0)
+            for d in range(768):
+                s += embeddings[i, d] * query[d]
+            _push_top_k(out_idx, out_score, chunk, i, s)
+
+    return out_idx, out_score
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _topk_dot_chunks(embeddings, query, top_k, num_chunks):
+    """Same as _topk_dot_768_chunks for any embedding dimension."""
+    num_docs, dim = embeddings.shape
+    chunk_size = (num_docs + num_chunks - 1) // num_chunks
+    out_idx = np.full((num_chunks, top_k), -1, dtype=np.int64)
+    out_score = np.full((num_chunks, top_k), -np.inf, dtype=np.float32)
+
+    for chunk in prange(num_chunks):
+        start = chunk * chunk_size
+        stop = min(start + chunk_size, num_docs)
+        for i in range(start, stop):
+            s = np.float32(0.0)
+            for d in range(dim):
+                s += embeddings[i, d] * query[d]
+            _push_top_k(out_idx, out_score, chunk, i, s)
+
+    return out_idx, out_score
+
+
+def _topk_dot_candidates(kernel, embeddings, query, top_k):
+    """Run a chunked kernel over float32 rows and return all per-chunk candidates."""
+    num_chunks = max(1, min(get_num_threads(), len(embeddings) // top_k))
+    chunk_idx, chunk_score = kernel(embeddings, query, top_k, num_chunks)
+
+    indices = chunk_idx.ravel()
+    scores = chunk_score.ravel()
+    found = indices >= 0
+    return indices[found], scores[found]
+
+
+def topk_dot(embeddings: np.ndarray, query: np.ndarray, top_k: int,
+             block_size: int = 16384) -> tuple:
+    """
+    Fused inner-product scoring and top-k selection.
+
+    Rows are split into one chunk per thread; each thread keeps its own top-k
+    while scoring, so the full similarity vector is never written out. The
+    per-thread candidates are merged here. 768-dim embeddings use a kernel
+    specialized for that dimension.
+
+    Numba has no float16 type, so float16 embeddings (the on-disk dtype) are
+    upcast into one reused float32 buffer of block_size rows at a time, and
+    the candidates of all blocks are merged.
+
+    Args:
+        embeddings: Document embeddings (n_docs, dim), float32 or float16
+        query: Contiguous float32 query vector (dim,)
+        top_k: Number of results (1 <= top_k <= n_docs)
+        block_size: Rows upcast per block for float16 embeddings
+
+    Returns:
+        Tuple of (indices, scores) sorted by descending score
+    """
+    kernel = _topk_dot_768_chunks if embeddings.shape[1] == KERNEL_DIM else _topk_dot_chunks
+
+    if embeddings.dtype == np.float32:
+        indices, scores = _topk_dot_candidates(kernel, embeddings, query, top_k)
+    else:
+        num_docs = len(embeddings)
+        buffer = np.empty((min(block_size, num_docs), embeddings.shape[1]), dtype=np.float32)
+        all_indices, all_scores = [], []
+        for start in range(0, num_docs, block_size):
+            block = buffer[:min(block_size, num_docs - start)]
+            block[...] = embeddings[start:start + len(block)]
+            indices, scores = _topk_dot_candidates(kernel, block, query, top_k)
+            all_indices.append(indices + start)
+            all_scores.append(scores)
+        indices, scores = np.concatenate(all_indices), np.concatenate(all_scores)
+
+    order = np.argsort(-scores, kind='stable')[:top_k]
+    return indices[order], scores[order]
@@ -3,8 +3,15 @@ Configuration file for the Multilingual Information Retrieval System.
 """
 
 import os
+import importlib.util
 from pathlib import Path
 
+# Thread cap for FAISS search. Beyond a handful of threads, small-batch search
+# loses more to thread wake-up and oversubscription than it gains. Applied to
+# FAISS's OpenMP pool when an index is built or loaded; torch and BLAS (corpus
+# encoding) keep their own thread counts.
+MAX_SEARCH_THREADS = min(os.cpu_count() or 1, 8)
+
 # Project paths
 PROJECT_ROOT = Path(__file__).parent
 DATA_DIR = PROJECT_ROOT / "data"
@@ -36,16 +43,65 @@ EMBEDDING_DIMENSION = 768  # Dimension of the multilingual model
 
 # Retrieval parameters
 DEFAULT_TOP_K = 10  # Number of documents to retrieve
-BATCH_SIZE = 32  # Batch size for encoding documents
+BATCH_SIZE = 128  # Batch size for encoding documents
+QUERY_BATCH_SIZE = 64  # Batch size for encoding query batches (e.g. during evaluation)
+EVAL_QUERY_CHUNK_SIZE = 256  # Queries retrieved per batched search during evaluation
+QUERY_CACHE_SIZE = 256  # Query embeddings kept (LRU) in interactive mode
+SERVE_MAX_BATCH = 32  # Queries coalesced into one encode + search by `main.py serve`
+SERVE_MAX_LATENCY_MS = 10  # How long `serve` waits for more queries to join a batch
+# Document rows scored per block in batched NumPy search. A block of
+# SEARCH_BLOCK_SIZE x 768 float32 (~48MB) plus its score tile stays cache-resident
+# while every query in the batch is scored against it
+SEARCH_BLOCK_SIZE = 16384
 
 # Index configuration
-INDEX_FILENAME = "multilingual_index.npz"
+EMBEDDINGS_FILENAME = "embeddings.npy"  # Raw, memory-mappable embeddings
+INDEX_FILENAME = "multilingual_index.npz"  # Compressed embeddings (legacy / --compress)
 METADATA_FILENAME = "document_metadata.json"
+DOC_META_FILENAME = "doc_meta.npz"  # doc_ids and integer language codes (vocab in the metadata JSON)
+DOC_TEXTS_FILENAME = "doc_texts.bin"  # All document texts, concatenated UTF-8
+DOC_TEXTS_OFFSETS_FILENAME = "doc_texts.offsets.npy"  # Byte offset of each text (N + 1 entries)
 FAISS_INDEX_FILENAME = "faiss_index.bin"
+TOKENIZED_CORPUS_FILENAME = "tokenized_corpus.npz"  # Token cache (in CACHE_DIR)
+QUANTIZED_INDEX_FILENAME = "quantized_index.npz"
+
+# Indexing backend ('numpy', 'faiss' or 'torch')
+# FAISS is preferred whenever it is installed; NumPy is the portable fallback
+FAISS_INSTALLED = importlib.util.find_spec('faiss') is not None
+DEFAULT_INDEX_BACKEND = 'faiss' if FAISS_INSTALLED else 'numpy'  # Can be overridden via CLI
+# 'torch' keeps the embeddings resident on the GPU and scores with torch matmul + topk
+INDEX_BACKENDS = ['numpy', 'faiss', 'torch']
+USE_GPU_FOR_FAISS = True  # Use GPU for FAISS (and the torch backend) if available
+FAISS_GPU_FLOAT16 = True  # Store vectors as float16 in GPU FAISS indexes (halves GPU memory traffic)
+
+# FAISS index type: 'flat' (exact), 'sq8' (exhaustive over 8-bit scalar-quantized vectors),
+# 'hnsw' (graph ANN, in RAM), 'ivfflat' (clustered ANN, full vectors), 'ivfsq8' (clustered ANN,
+# 8-bit vectors), 'ivfpq' (compressed ANN), 'ivfpqfs' (compressed ANN, 4-bit PQ FastScan)
+# or 'auto' (flat up to AUTO_ANN_THRESHOLD documents, else hnsw)
+FAISS_INDEX_TYPES = ['flat', 'sq8', 'hnsw', 'ivfflat', 'ivfsq8', 'ivfpq', 'ivfpqfs', 'auto']
+DEFAULT_FAISS_INDEX_TYPE = 'auto'
+# Largest corpus 'auto' still searches exactly; kept well above CORPUS_SAMPLE_SIZE so
+# default builds (and their evaluation) stay exact
+AUTO_ANN_THRESHOLD = 100000
+HNSW_M = 32  # Graph neighbors per node
+HNSW_EF_CONSTRUCTION = 200  # Build-time search depth (higher = better graph, slower build)
+HNSW_EF_SEARCH = 64  # Query-time search depth (higher = better recall, slower search)
+IVF_NLIST = None  # Number of IVF clusters (None = 4*sqrt(N), capped by the training set size)
+IVF_NPROBE = 16  # Clusters visited per query
+IVFPQ_M = 96  # PQ sub-quantizers (must divide the embedding dimension)
+IVFPQ_NBITS = 8  # Bits per PQ code
+IVFPQ_FS_M = 192  # FastScan sub-quantizers, 4 bits each (must divide the embedding dimension)
+
+# On-disk dtype of the saved embedding matrix ('float16' halves index size and load I/O;
+# scores are always computed in float32)
+EMBEDDING_STORAGE_DTYPE = 'float16'
 
-# Indexing backend ('numpy' or 'faiss')
-DEFAULT_INDEX_BACKEND = 'numpy'  # Can be overridden via CLI
-USE_GPU_FOR_FAISS = True  # Use GPU for FAISS if available
+# Embedding quantization for the NumPy backend (None, 'int8' or 'binary')
+# int8 stores 1 byte/dim (4x less memory traffic per search); uses SimSIMD if installed
+# binary keeps 1 bit/dim (sign) for a Hamming pre-pass whose candidates are rescored exactly
+EMBEDDING_QUANTIZATION = None
+BINARY_RESCORE_MULTIPLIER = 10  # Hamming candidates rescored per requested result
+INT8_RESCORE_CANDIDATES = 1000  # Best int8 hits rescored with the float embeddings (0 = int8 scores only)
 
 # Sample size for quick testing (set to None to use full corpus)
 # For production, set to None. For testing, use a smaller number like 5000
@@ -54,6 +110,7 @@ CORPUS_SAMPLE_SIZE = 10000
 # Device configuration (auto-detect GPU)
 import torch
 DEVICE = 'cuda' if torch.cuda.is_available() else 'cpu'
+USE_HALF_PRECISION = True  # Run the embedding model in BF16/FP16 on GPU (ignored on CPU)
 
 # Logging
 LOG_LEVEL = "INFO"
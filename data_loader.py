@@ -4,6 +4,7 @@ Data loader module for loading MIRACL datasets.
 
 import ir_datasets
 import logging
+import numpy as np
 from typing import List, Dict, Optional
 import random
 from config import LANGUAGES, CORPUS_SAMPLE_SIZE
@@ -13,7 +14,12 @@ logger = logging.getLogger(__name__)
 
 
 class DataLoader:
-    """Handles loading and preprocessing of multilingual corpus data."""
+    """
+    Handles loading and preprocessing of multilingual corpus data.
+    
+    The corpus is stored column-wise (parallel doc_ids / doc_texts lists and an
+    int8 language-code array) rather than as one dict per document.
+    """
     
     def __init__(self, languages: Optional[List[str]] = None):
         """
@@ -23,53 +29,76 @@ class DataLoader:
             languages: List of languages to load. If None, loads all supported languages.
         """
         self.languages = languages or list(LANGUAGES.keys())
-        self.corpus_docs = []
+        self.doc_ids: List[str] = []
+        self.doc_texts: List[str] = []
+        self.doc_languages = np.empty(0, dtype=np.int8)  # Index into self.languages
         
-    def load_corpus(self, sample_size: Optional[int] = CORPUS_SAMPLE_SIZE) -> List[Dict[str, str]]:
+    def load_corpus(self, sample_size: Optional[int] = CORPUS_SAMPLE_SIZE) -> int:
         """
         Load corpus documents from all specified languages.
         
+        Documents are streamed once; when sampling, reservoir sampling keeps only
+        sample_size documents in memory at any time.
+        
         Args:
             sample_size: If specified, randomly sample this many documents from the full corpus.
                         If None, load all documents.
         
         Returns:
-            List of document dictionaries with 'doc_id', 'text', and 'language' fields.
+            Number of documents loaded. Access them via get_corpus_texts(),
+            get_corpus_ids() and get_corpus_languages().
         """
-        all_docs = []
+        doc_ids = []
+        doc_texts = []
+        doc_languages = []
+        num_seen = 0
         
-        for lang in self.languages:
+        for lang_code, lang in enumerate(self.languages):
             logger.info(f"Loading {lang} corpus...")
             dataset_name = LANGUAGES[lang]
+            num_lang_docs = 0
             
             try:
                 dataset = ir_datasets.load(dataset_name)
-                lang_docs = []
                 
                 for doc in dataset.docs_iter():
-                    lang_docs.append({
-                        'doc_id': doc.doc_id,
-                        'text': doc.text,
-                        'language': lang
-                    })
+                    num_lang_docs += 1
+                    
+                    if sample_size is None or num_seen < sample_size:
+                        doc_ids.append(doc.doc_id)
+                        doc_texts.append(doc.text)
+                        doc_languages.append(lang_code)
+                    else:
+                        # Reservoir sampling (Algorithm R): keep the new document with
+                        # probability sample_size / (num_seen + 1)
+                        slot = random.randrange(num_seen + 1)
+                        if slot < sample_size:
+                            doc_ids[slot] = doc.doc_id
+                            doc_texts[slot] = doc.text
+                            doc_languages[slot] = lang_code
+                    num_seen += 1
                 
-                logger.info(f"Loaded {len(lang_docs)} {lang} documents")
-                all_docs.extend(lang_docs)
+                logger.info(f"Loaded {num_lang_docs} {lang} documents")
                 
             except Exception as e:
                 logger.error(f"Error loading {lang} corpus: {e}")
                 raise
         
-        # Sample if requested
-        if sample_size is not None and sample_size < len(all_docs):
-            logger.info(f"Sampling {sample_size} documents from {len(all_docs)} total documents")
-            all_docs = random.sample(all_docs, sample_size)
-            random.shuffle(all_docs)  # Shuffle to mix languages
+        # Shuffle the sample to mix languages
+        if sample_size is not None and sample_size < num_seen:
+            logger.info(f"Sampled {sample_size} documents from {num_seen} total documents")
+            order = list(range(len(doc_ids)))
+            random.shuffle(order)
+            doc_ids = [doc_ids[i] for i in order]
+            doc_texts = [doc_texts[i] for i in order]
+            doc_languages = [doc_languages[i] for i in order]
         
-        self.corpus_docs = all_docs
-        logger.info(f"Total corpus size: {len(all_docs)} documents")
+        self.doc_ids = doc_ids
+        self.doc_texts = doc_texts
+        self.doc_languages = np.array(doc_languages, dtype=np.int8)
+        logger.info(f"Total corpus size: {len(doc_ids)} documents")
         
-        return all_docs
+        return len(doc_ids)
     
     def load_queries(self, language: str = 'en', split: str = 'dev') -> List[Dict[str, str]]:
         """
@@ -104,12 +133,12 @@ class DataLoader:
     
     def get_corpus_texts(self) -> List[str]:
         """Get list of corpus document texts."""
-        return [doc['text'] for doc in self.corpus_docs]
+        return self.doc_texts
     
     def get_corpus_ids(self) -> List[str]:
         """Get list of corpus document IDs."""
-        return [doc['doc_id'] for doc in self.corpus_docs]
+        return self.doc_ids
     
     def get_corpus_languages(self) -> List[str]:
         """Get list of corpus document languages."""
-        return [doc['language'] for doc in self.corpus_docs]
+        return [self.languages[code] for code in self.doc_languages]
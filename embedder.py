@@ -3,10 +3,15 @@ Embedding generator module using sentence-transformers.
 """
 
 import numpy as np
+import functools
+import gc
+import hashlib
 import logging
+from pathlib import Path
 from typing import List, Union
+import torch
 from sentence_transformers import SentenceTransformer
-from config import MODEL_NAME, DEVICE, BATCH_SIZE
+from config import MODEL_NAME, DEVICE, BATCH_SIZE, QUERY_BATCH_SIZE, USE_HALF_PRECISION
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,24 +20,69 @@ logger = logging.getLogger(__name__)
 class MultilingualEmbedder:
     """Generates dense embeddings for multilingual text using sentence-transformers."""
     
-    def __init__(self, model_name: str = MODEL_NAME, device: str = DEVICE):
+    def __init__(self, model_name: str = MODEL_NAME, device: str = DEVICE,
+                 half_precision: bool = USE_HALF_PRECISION):
         """
         Initialize the embedder with a sentence-transformer model.
         
         Args:
             model_name: Name of the sentence-transformers model to use
             device: Device to run the model on ('cuda' or 'cpu')
+            half_precision: Run the model in BF16 (Ampere+) or FP16 on GPU
         """
         self.model_name = model_name
         self.device = device
+        self.half_precision = half_precision and str(device).startswith('cuda')
+        self._model = None
+        self._load_model()
+    
+    @property
+    def model(self) -> SentenceTransformer:
+        """The underlying SentenceTransformer, reloaded on demand after release()."""
+        if self._model is None:
+            self._load_model()
+        return self._model
+    
+    def _load_model(self) -> None:
+        """Load the sentence-transformer model onto the configured device."""
+        logger.info(f"Loading model: {self.model_name} on device: {self.device}")
+        model = SentenceTransformer(self.model_name, device=self.device)
+        model.eval()
+        
+        if self.half_precision:
+            # Tensor cores: half-precision weights/activations, TF32 for any remaining FP32 matmuls
+            torch.backends.cuda.matmul.allow_tf32 = True
+            if torch.cuda.is_bf16_supported():
+                model.to(torch.bfloat16)
+                logger.info("Using BF16 inference")
+            else:
+                model.half()
+                logger.info("Using FP16 inference")
+        
+        self._model = model
+        logger.info(f"Model loaded successfully. Embedding dimension: {model.get_sentence_embedding_dimension()}")
+    
+    def release(self) -> None:
+        """
+        Free the model's host and GPU memory.
         
-        logger.info(f"Loading model: {model_name} on device: {device}")
-        self.model = SentenceTransformer(model_name, device=device)
-        logger.info(f"Model loaded successfully. Embedding dimension: {self.model.get_sentence_embedding_dimension()}")
+        Call this once corpus encoding is done so the embedding matrix and index
+        do not have to share memory with the model. The model is reloaded
+        automatically the next time it is needed.
+        """
+        if self._model is None:
+            return
+        
+        self._model = None
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        logger.info("Released embedding model")
     
     def encode(self, texts: Union[str, List[str]], 
                batch_size: int = BATCH_SIZE,
-               show_progress: bool = True) -> np.ndarray:
+               show_progress: bool = True,
+               convert_to_tensor: bool = False) -> np.ndarray:
         """
         Generate embeddings for input text(s).
         
@@ -40,22 +90,42 @@ class MultilingualEmbedder:
             texts: Single text string or list of text strings
             batch_size: Batch size for encoding
             show_progress: Whether to show progress bar
+            convert_to_tensor: Return a float32 torch tensor on the model's device
+                               instead of copying the embeddings to the host
         
         Returns:
-            NumPy array of embeddings with shape (n_texts, embedding_dim)
+            NumPy array (or torch tensor) of embeddings with shape (n_texts, embedding_dim)
         """
         if isinstance(texts, str):
             texts = [texts]
         
         logger.info(f"Encoding {len(texts)} texts...")
         
-        embeddings = self.model.encode(
-            texts,
-            batch_size=batch_size,
-            show_progress_bar=show_progress,
-            convert_to_numpy=True,
-            normalize_embeddings=True  # Normalize for cosine similarity
-        )
+        # inference_mode skips autograd bookkeeping (version counters, view
+        # tracking) entirely, which no_grad inside model.encode does not
+        with torch.inference_mode():
+            if self.half_precision:
+                # Upcast to FP32 before normalizing so half-precision rounding does not
+                # leave the vectors off the unit sphere
+                embeddings = self.model.encode(
+                    texts,
+                    batch_size=batch_size,
+                    show_progress_bar=show_progress,
+                    convert_to_tensor=True,
+                    normalize_embeddings=False
+                )
+                embeddings = torch.nn.functional.normalize(embeddings.float(), p=2, dim=-1)
+                if not convert_to_tensor:
+                    embeddings = embeddings.cpu().numpy()
+            else:
+                embeddings = self.model.encode(
+                    texts,
+                    batch_size=batch_size,
+                    show_progress_bar=show_progress,
+                    convert_to_numpy=not convert_to_tensor,
+                    convert_to_tensor=convert_to_tensor,
+                    normalize_embeddings=True  # Normalize for cosine similarity
+                )
         
         logger.info(f"Encoding complete. Shape: {embeddings.shape}")
         return embeddings
@@ -75,18 +145,143 @@ class MultilingualEmbedder:
         logger.info(f"Encoding corpus of {len(corpus_texts)} documents...")
         return self.encode(corpus_texts, batch_size=batch_size, show_progress=True)
     
-    def encode_query(self, query: str) -> np.ndarray:
+    def encode_corpus_cached(self, corpus_texts: List[str], cache_path: Path,
+                             batch_size: int = BATCH_SIZE) -> np.ndarray:
+        """
+        Generate corpus embeddings, caching the tokenized corpus on disk.
+        
+        Token ids are stored unpadded (flat array + lengths) so re-embedding the
+        same corpus, e.g. after an aborted run, skips tokenization entirely.
+        Batches are formed from length-sorted documents so each batch is only
+        padded to its own longest sequence.
+        
+        Args:
+            corpus_texts: List of document texts
+            cache_path: Path of the .npz token cache
+            batch_size: Batch size for encoding
+        
+        Returns:
+            NumPy array of L2-normalized document embeddings
+        """
+        cache_path = Path(cache_path)
+        input_ids, lengths = self._load_or_tokenize(corpus_texts, cache_path)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        pad_id = self.model.tokenizer.pad_token_id
+        
+        # Length-bucketed batching: neighbors in sorted order have similar lengths
+        order = np.argsort(lengths, kind='stable')
+        embeddings = np.empty((len(corpus_texts), self.get_embedding_dimension()), dtype=np.float32)
+        
+        logger.info(f"Encoding corpus of {len(corpus_texts)} documents from token cache...")
+        with torch.inference_mode():
+            for start in range(0, len(order), batch_size):
+                batch_idx = order[start:start + batch_size]
+                max_len = int(lengths[batch_idx].max())
+                
+                batch_ids = np.full((len(batch_idx), max_len), pad_id, dtype=np.int64)
+                attention_mask = np.zeros((len(batch_idx), max_len), dtype=np.int64)
+                for row, doc in enumerate(batch_idx):
+                    length = lengths[doc]
+                    batch_ids[row, :length] = input_ids[offsets[doc]:offsets[doc] + length]
+                    attention_mask[row, :length] = 1
+                
+                features = {
+                    'input_ids': torch.from_numpy(batch_ids).to(self.device),
+                    'attention_mask': torch.from_numpy(attention_mask).to(self.device)
+                }
+                # Full SentenceTransformer pipeline (transformer + the model's own pooling)
+                batch_embeddings = self.model(features)['sentence_embedding']
+                batch_embeddings = torch.nn.functional.normalize(batch_embeddings.float(), p=2, dim=1)
+                embeddings[batch_idx] = batch_embeddings.cpu().numpy()
+        
+        logger.info(f"Encoding complete. Shape: {embeddings.shape}")
+        return embeddings
+    
+    def _load_or_tokenize(self, corpus_texts: List[str], cache_path: Path) -> tuple:
+        """
+        Load token ids from the cache, or tokenize the corpus and write the cache.
+        
+        Args:
+            corpus_texts: List of document texts
+            cache_path: Path of the .npz token cache
+        
+        Returns:
+            Tuple of (flat int32 token ids, int32 per-document lengths)
+        """
+        # The cache is only valid for the same model and the same texts in the same order
+        fingerprint = hashlib.sha1(self.model_name.encode('utf-8'))
+        for text in corpus_texts:
+            fingerprint.update(text.encode('utf-8'))
+            fingerprint.update(b'\0')
+        fingerprint = fingerprint.hexdigest()
+        
+        if cache_path.exists():
+            cache = np.load(cache_path)
+            if str(cache['fingerprint']) == fingerprint:
+                logger.info(f"Loaded tokenized corpus from {cache_path}")
+                return cache['input_ids'], cache['lengths']
+            logger.info("Token cache does not match the corpus. Re-tokenizing...")
+        
+        logger.info(f"Tokenizing {len(corpus_texts)} documents...")
+        encoded = self.model.tokenizer(corpus_texts, padding=False, truncation=True,
+                                       max_length=self.model.max_seq_length)
+        lengths = np.fromiter((len(ids) for ids in encoded['input_ids']),
+                              dtype=np.int32, count=len(corpus_texts))
+        input_ids = np.fromiter((token for ids in encoded['input_ids'] for token in ids),
+                                dtype=np.int32, count=int(lengths.sum()))
+        
+        np.savez(cache_path, input_ids=input_ids, lengths=lengths, fingerprint=np.array(fingerprint))
+        logger.info(f"Saved tokenized corpus to {cache_path}")
+        return input_ids, lengths
+    
+    def encode_query(self, query: str, convert_to_tensor: bool = False) -> np.ndarray:
         """
         Generate embedding for a single query.
         
         Args:
             query: Query text
+            convert_to_tensor: Keep the embedding on the model's device as a torch tensor
         
         Returns:
-            NumPy array with shape (1, embedding_dim)
+            NumPy array (or torch tensor) with shape (1, embedding_dim)
         """
-        return self.encode(query, show_progress=False)
+        return self.encode(query, show_progress=False, convert_to_tensor=convert_to_tensor)
+    
+    def encode_queries(self, queries: List[str],
+                       batch_size: int = QUERY_BATCH_SIZE,
+                       convert_to_tensor: bool = False) -> np.ndarray:
+        """
+        Generate embeddings for many queries in a single batched forward pass.
+        
+        Args:
+            queries: List of query texts
+            batch_size: Batch size for encoding
+            convert_to_tensor: Keep the embeddings on the model's device as a torch tensor
+        
+        Returns:
+            NumPy array (or torch tensor) with shape (n_queries, embedding_dim)
+        """
+        return self.encode(queries, batch_size=batch_size, show_progress=False,
+                           convert_to_tensor=convert_to_tensor)
     
     def get_embedding_dimension(self) -> int:
         """Get the dimension of the embeddings produced by this model."""
         return self.model.get_sentence_embedding_dimension()
+
+
+@functools.lru_cache(maxsize=None)
+def get_embedder(model_name: str = MODEL_NAME, device: str = DEVICE) -> MultilingualEmbedder:
+    """
+    Return the shared embedder for a model and device, loading it on first use.
+    
+    Building, searching and evaluating in the same process reuse one model
+    instead of reading the weights and allocating GPU memory again each time.
+    
+    Args:
+        model_name: Name of the sentence-transformers model to use
+        device: Device to run the model on ('cuda' or 'cpu')
+    
+    Returns:
+        Cached MultilingualEmbedder instance
+    """
+    return MultilingualEmbedder(model_name=model_name, device=device)
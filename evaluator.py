@@ -5,28 +5,40 @@ Calculates nDCG@10 and Recall@100 metrics for cross-lingual retrieval.
 
 import logging
 import numpy as np
-from typing import List, Dict, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import AbstractSet, List, Dict, Tuple, Optional
 from collections import defaultdict
 import ir_datasets
 
 from embedder import MultilingualEmbedder
 from indexer import VectorIndex
 from retriever import CrossLingualRetriever
-from config import LANGUAGES
+from config import LANGUAGES, EVAL_QUERY_CHUNK_SIZE
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Precomputed DCG rank discounts 1 / log2(rank + 1) for ranks 1..100
+_DCG_DISCOUNTS = 1.0 / np.log2(np.arange(2, 102))
+
+
+def _dcg_discounts(n: int) -> np.ndarray:
+    """Return the first n DCG rank discounts, extending the precomputed table if needed."""
+    if n <= len(_DCG_DISCOUNTS):
+        return _DCG_DISCOUNTS[:n]
+    return 1.0 / np.log2(np.arange(2, n + 2))
+
+
 def calculate_recall_at_k(retrieved_doc_ids: List[str], 
-                          relevant_doc_ids: List[str], 
+                          relevant_doc_ids: AbstractSet[str], 
                           k: int = 100) -> float:
     """
     Calculate Recall@k metric.
     
     Args:
         retrieved_doc_ids: List of retrieved document IDs (ranked)
-        relevant_doc_ids: List of ground truth relevant document IDs
+        relevant_doc_ids: Set of ground truth relevant document IDs
         k: Cutoff for recall calculation
     
     Returns:
@@ -35,24 +47,21 @@ def calculate_recall_at_k(retrieved_doc_ids: List[str],
     if len(relevant_doc_ids) == 0:
         return 0.0
     
-    retrieved_k = set(retrieved_doc_ids[:k])
-    relevant_set = set(relevant_doc_ids)
-    
-    num_relevant_retrieved = len(retrieved_k & relevant_set)
-    recall = num_relevant_retrieved / len(relevant_set)
+    num_relevant_retrieved = len(relevant_doc_ids.intersection(retrieved_doc_ids[:k]))
+    recall = num_relevant_retrieved / len(relevant_doc_ids)
     
     return recall
 
 
 def calculate_ndcg_at_k(retrieved_doc_ids: List[str], 
-                        relevant_doc_ids: List[str], 
+                        relevant_doc_ids: AbstractSet[str], 
                         k: int = 10) -> float:
     """
     Calculate nDCG@k (Normalized Discounted Cumulative Gain at k).
     
     Args:
         retrieved_doc_ids: List of retrieved document IDs (ranked)
-        relevant_doc_ids: List of ground truth relevant document IDs
+        relevant_doc_ids: Set of ground truth relevant document IDs
         k: Cutoff for nDCG calculation
     
     Returns:
@@ -61,20 +70,14 @@ def calculate_ndcg_at_k(retrieved_doc_ids: List[str],
     if len(relevant_doc_ids) == 0:
         return 0.0
     
-    relevant_set = set(relevant_doc_ids)
-    
-    # Calculate DCG@k
-    dcg = 0.0
-    for i, doc_id in enumerate(retrieved_doc_ids[:k], 1):
-        if doc_id in relevant_set:
-            # Binary relevance: 1 if relevant, 0 otherwise
-            # DCG formula: sum(rel_i / log2(i + 1))
-            dcg += 1.0 / np.log2(i + 1)
+    # Calculate DCG@k with binary relevance: sum(rel_i / log2(i + 1))
+    top_k = retrieved_doc_ids[:k]
+    relevance = np.fromiter((doc_id in relevant_doc_ids for doc_id in top_k),
+                            dtype=np.float64, count=len(top_k))
+    dcg = float(relevance @ _dcg_discounts(len(top_k)))
     
     # Calculate IDCG@k (Ideal DCG)
-    idcg = 0.0
-    for i in range(min(k, len(relevant_doc_ids))):
-        idcg += 1.0 / np.log2(i + 2)  # i+2 because i starts at 0
+    idcg = float(_dcg_discounts(min(k, len(relevant_doc_ids))).sum())
     
     # Normalize
     if idcg == 0.0:
@@ -109,7 +112,7 @@ class IREvaluator:
         Returns:
             Tuple of (queries, qrels) where:
                 queries: List of (query_id, query_text) tuples
-                qrels: Dict mapping query_id -> list of relevant doc_ids
+                qrels: Dict mapping query_id -> frozenset of relevant doc_ids
         """
         dataset_name = LANGUAGES[language]
         dataset_full = f"{dataset_name}/{split}"
@@ -132,7 +135,8 @@ class IREvaluator:
                     qrels[qrel.query_id].append(qrel.doc_id)
             
             logger.info(f"Loaded {len(queries)} queries and {len(qrels)} query-document pairs")
-            return queries, dict(qrels)
+            # Frozen once here so the metric functions never rebuild the sets per query
+            return queries, {query_id: frozenset(doc_ids) for query_id, doc_ids in qrels.items()}
             
         except Exception as e:
             logger.error(f"Error loading evaluation data: {e}")
@@ -166,37 +170,59 @@ class IREvaluator:
             queries = queries[:max_queries]
             logger.info(f"Limiting evaluation to {max_queries} queries")
         
+        # Skip queries without relevance judgments. Judged queries none of whose relevant
+        # documents made it into the (possibly sampled) corpus are not encoded or
+        # searched either, but still count as scoring 0 below
+        corpus_doc_ids = set(self.retriever.index.doc_ids.tolist())
+        num_judged = sum(1 for query_id, _ in queries if query_id in qrels)
+        queries = [(query_id, query_text) for query_id, query_text in queries
+                   if query_id in qrels and not qrels[query_id].isdisjoint(corpus_doc_ids)]
+        num_unanswerable = num_judged - len(queries)
+        if num_unanswerable:
+            logger.info(f"{num_unanswerable} queries have no relevant documents in the index "
+                        f"(scored 0 without searching)")
+        
+        # Retrieve ranked doc_ids (up to recall_k each) in chunks of queries, so each
+        # chunk is one batched encode + search while memory stays bounded
+        query_texts = [query_text for _, query_text in queries]
+        chunks = [query_texts[start:start + EVAL_QUERY_CHUNK_SIZE]
+                  for start in range(0, len(query_texts), EVAL_QUERY_CHUNK_SIZE)]
+        all_doc_ids = []
+        encode = self.retriever.embedder.encode_queries
+        with ThreadPoolExecutor(max_workers=1) as encoder:
+            # Encode the next chunk on a worker thread while the current one is
+            # searched; the model forward pass and FAISS/BLAS search release the GIL
+            pending = encoder.submit(encode, chunks[0]) if chunks else None
+            for i in range(len(chunks)):
+                query_embeddings = pending.result()
+                if i + 1 < len(chunks):
+                    pending = encoder.submit(encode, chunks[i + 1])
+                all_doc_ids.extend(self.retriever.retrieve_ids_by_embeddings(query_embeddings, top_k=recall_k))
+        
         # Evaluate each query
         ndcg_scores = []
         recall_scores = []
         queries_evaluated = 0
         
-        for query_id, query_text in queries:
-            # Skip queries without relevance judgments
-            if query_id not in qrels:
-                continue
-            
+        for (query_id, _), retrieved_doc_ids in zip(queries, all_doc_ids):
             relevant_docs = qrels[query_id]
+            retrieved_doc_ids = retrieved_doc_ids.tolist()  # cheaper to slice/iterate than an object array
             
-            # Retrieve documents (get up to recall_k documents)
-            try:
-                results = self.retriever.retrieve(query_text, top_k=recall_k, return_full_text=False)
-                retrieved_doc_ids = [result['doc_id'] for result in results]
-                
-                # Calculate metrics
-                ndcg = calculate_ndcg_at_k(retrieved_doc_ids, relevant_docs, k=ndcg_k)
-                recall = calculate_recall_at_k(retrieved_doc_ids, relevant_docs, k=recall_k)
-                
-                ndcg_scores.append(ndcg)
-                recall_scores.append(recall)
-                queries_evaluated += 1
-                
-                if queries_evaluated % 10 == 0:
-                    logger.info(f"Evaluated {queries_evaluated}/{len(queries)} queries...")
-                    
-            except Exception as e:
-                logger.warning(f"Error evaluating query {query_id}: {e}")
-                continue
+            # Calculate metrics on the already-truncated rankings
+            ndcg = calculate_ndcg_at_k(retrieved_doc_ids[:ndcg_k], relevant_docs, k=ndcg_k)
+            recall = calculate_recall_at_k(retrieved_doc_ids[:recall_k], relevant_docs, k=recall_k)
+            
+            ndcg_scores.append(ndcg)
+            recall_scores.append(recall)
+            queries_evaluated += 1
+            
+            if queries_evaluated % 10 == 0:
+                logger.info(f"Evaluated {queries_evaluated}/{len(queries)} queries...")
+        
+        # Unanswerable judged queries stay in the averages, as if searched and missed
+        ndcg_scores.extend([0.0] * num_unanswerable)
+        recall_scores.extend([0.0] * num_unanswerable)
+        queries_evaluated += num_unanswerable
         
         # Calculate average metrics
         if len(ndcg_scores) == 0:
@@ -213,7 +239,8 @@ class IREvaluator:
         results = {
             f'nDCG@{ndcg_k}': avg_ndcg,
             f'Recall@{recall_k}': avg_recall,
-            'num_queries': queries_evaluated
+            'num_queries': queries_evaluated,
+            'num_unanswerable': num_unanswerable
         }
         
         logger.info(f"Evaluation complete for {language}:")
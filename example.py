@@ -3,7 +3,7 @@ Example script demonstrating the Multilingual IR System usage.
 """
 
 from data_loader import DataLoader
-from embedder import MultilingualEmbedder
+from embedder import get_embedder
 from indexer import VectorIndex
 from retriever import CrossLingualRetriever
 from config import LANGUAGES
@@ -17,12 +17,13 @@ def demo_build_small_index():
     # Load a small sample
     print("\n1. Loading data...")
     loader = DataLoader(languages=list(LANGUAGES.keys()))
-    corpus_docs = loader.load_corpus(sample_size=1000)
+    loader.load_corpus(sample_size=1000)
     
     # Generate embeddings
     print("\n2. Generating embeddings...")
-    embedder = MultilingualEmbedder()
+    embedder = get_embedder()
     embeddings = embedder.encode_corpus(loader.get_corpus_texts())
+    embedder.release()
     
     # Build index
     print("\n3. Building index...")
@@ -54,7 +55,7 @@ def demo_search():
     
     # Initialize retriever
     print("\n2. Initializing retriever...")
-    embedder = MultilingualEmbedder()
+    embedder = get_embedder()
     retriever = CrossLingualRetriever(embedder, index)
     
     # Example queries
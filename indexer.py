@@ -6,9 +6,17 @@ Supports both NumPy (exact search) and FAISS (fast approximate/exact search).
 import numpy as np
 import json
 import logging
+import mmap
+import os
 from pathlib import Path
 from typing import List, Dict, Optional
-from config import INDEX_DIR, INDEX_FILENAME, METADATA_FILENAME, FAISS_INDEX_FILENAME
+from config import (INDEX_DIR, INDEX_FILENAME, EMBEDDINGS_FILENAME, METADATA_FILENAME, DOC_META_FILENAME,
+                    DOC_TEXTS_FILENAME, DOC_TEXTS_OFFSETS_FILENAME, FAISS_INDEX_FILENAME,
+                    QUANTIZED_INDEX_FILENAME, EMBEDDING_QUANTIZATION, EMBEDDING_STORAGE_DTYPE,
+                    INDEX_BACKENDS, QUERY_BATCH_SIZE, BINARY_RESCORE_MULTIPLIER, INT8_RESCORE_CANDIDATES,
+                    MAX_SEARCH_THREADS, FAISS_GPU_FLOAT16, FAISS_INDEX_TYPES, DEFAULT_FAISS_INDEX_TYPE, AUTO_ANN_THRESHOLD, HNSW_M,
+                    HNSW_EF_CONSTRUCTION, HNSW_EF_SEARCH, IVF_NLIST, IVF_NPROBE, IVFPQ_M, IVFPQ_NBITS, IVFPQ_FS_M,
+                    SEARCH_BLOCK_SIZE)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -23,52 +31,199 @@ except ImportError:
     logger.warning("FAISS not installed. Only NumPy backend will be available.")
     logger.warning("Install with: pip install faiss-cpu  (or faiss-gpu for GPU support)")
 
+# PyTorch backs the 'torch' backend (GPU-resident exact search)
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+# Lets FAISS indexes search torch tensors in place (CUDA tensors on GPU indexes), so
+# query embeddings produced on the GPU never have to be copied to the host
+try:
+    import faiss.contrib.torch_utils  # noqa: F401 (patches faiss index classes on import)
+    FAISS_TORCH_AVAILABLE = FAISS_AVAILABLE and TORCH_AVAILABLE
+except ImportError:
+    FAISS_TORCH_AVAILABLE = False
+
+# SimSIMD provides native int8 dot-product kernels for the quantized NumPy backend
+try:
+    import simsimd
+    SIMSIMD_AVAILABLE = True
+except ImportError:
+    SIMSIMD_AVAILABLE = False
+
+# Numba-compiled fused scoring + top-k kernel for the NumPy backend
+try:
+    from _kernels import topk_dot
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Rows upcast to float32 per block when scoring float16 or int8 embeddings
+UPCAST_BLOCK_SIZE = 16384
+
+# Set bits per byte value, for Hamming distances without np.bitwise_count (NumPy < 2.0)
+_POPCOUNT_TABLE = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint16)
+
+# Rows checked by the unit-norm sanity check in build()/load()
+NORM_CHECK_SAMPLE_SIZE = 1000
+
+
+def _is_tensor(array) -> bool:
+    """Return True if array is a torch tensor rather than a NumPy array."""
+    return TORCH_AVAILABLE and isinstance(array, torch.Tensor)
+
+
+def pack_texts(texts: List[str]) -> tuple:
+    """
+    Pack texts into one contiguous UTF-8 byte array plus a byte offset table.
+    
+    Text i is blob[offsets[i]:offsets[i + 1]]. Unlike a list of str this costs no
+    per-object overhead and is written to / memory-mapped from disk as is.
+    
+    Args:
+        texts: List of texts
+    
+    Returns:
+        Tuple of (blob, offsets): uint8 array and int64 array of len(texts) + 1 offsets
+    """
+    encoded = [text.encode('utf-8') for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+    blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    return blob, offsets
+
+
+def unpack_text(blob: np.ndarray, offsets: np.ndarray, index: int,
+                max_chars: Optional[int] = None) -> str:
+    """
+    Decode text `index` from a blob and offset table built by pack_texts().
+    
+    Args:
+        blob: UTF-8 byte array
+        offsets: Byte offset table
+        index: Index of the text
+        max_chars: If set, decode only the first max_chars characters
+    
+    Returns:
+        Decoded text (or its prefix)
+    """
+    start, end = int(offsets[index]), int(offsets[index + 1])
+    if max_chars is None:
+        return blob[start:end].tobytes().decode('utf-8')
+    # A character is at most 4 UTF-8 bytes; a sequence cut at the end is dropped
+    end = min(end, start + 4 * max_chars)
+    return blob[start:end].tobytes().decode('utf-8', errors='ignore')[:max_chars]
+
 
 class VectorIndex:
-    """Manages the vector index for multilingual document retrieval."""
+    """
+    Manages the vector index for multilingual document retrieval.
+    
+    Invariant: all stored document embeddings are L2-normalized, so the raw
+    inner product equals cosine similarity and no norms are computed at search
+    time. build() normalizes its copy of the embeddings once (recorded as
+    metadata['normalized']) and load() verifies the invariant on a sample of
+    rows; queries are expected to be normalized as well (MultilingualEmbedder
+    always does this), so search never normalizes per query by default.
+    """
     
-    def __init__(self, index_dir: Path = INDEX_DIR, backend: str = 'numpy', use_gpu: bool = False):
+    def __init__(self, index_dir: Path = INDEX_DIR, backend: str = 'numpy', use_gpu: bool = False,
+                 quantization: Optional[str] = EMBEDDING_QUANTIZATION,
+                 index_type: str = DEFAULT_FAISS_INDEX_TYPE, index_string: Optional[str] = None):
         """
         Initialize the VectorIndex.
         
         Args:
             index_dir: Directory to store index files
-            backend: Indexing backend ('numpy' or 'faiss')
-            use_gpu: Use GPU for FAISS (only applicable if backend='faiss')
+            backend: Indexing backend ('numpy', 'faiss' or 'torch')
+            use_gpu: Use GPU for FAISS or torch (not applicable if backend='numpy')
+            quantization: Embedding quantization for the NumPy backend (None, 'int8' or 'binary')
+            index_type: FAISS index type (one of FAISS_INDEX_TYPES, e.g. 'flat', 'hnsw' or
+                        'auto'; only applicable if backend='faiss')
+            index_string: FAISS index_factory string (e.g. "IVF4096,PQ192x4fs"); overrides
+                          index_type (only applicable if backend='faiss')
         """
         self.index_dir = Path(index_dir)
         self.index_dir.mkdir(exist_ok=True)
         
         # Validate backend
-        if backend not in ['numpy', 'faiss']:
-            raise ValueError(f"Invalid backend: {backend}. Must be 'numpy' or 'faiss'")
+        if backend not in INDEX_BACKENDS:
+            raise ValueError(f"Invalid backend: {backend}. Must be one of {INDEX_BACKENDS}")
         
         if backend == 'faiss' and not FAISS_AVAILABLE:
             logger.error("FAISS backend requested but FAISS is not installed!")
             logger.error("Install with: pip install faiss-cpu  (or faiss-gpu for GPU)")
             raise ImportError("FAISS not available. Install faiss-cpu or faiss-gpu")
         
+        if backend == 'torch' and not TORCH_AVAILABLE:
+            raise ImportError("PyTorch not available. Install torch")
+        
+        if quantization not in [None, 'int8', 'binary']:
+            raise ValueError(f"Invalid quantization: {quantization}. Must be None, 'int8' or 'binary'")
+        
+        if index_type not in FAISS_INDEX_TYPES:
+            raise ValueError(f"Invalid index type: {index_type}. Must be one of {FAISS_INDEX_TYPES}")
+        
         self.backend = backend
-        self.use_gpu = use_gpu and backend == 'faiss'
+        self.use_gpu = use_gpu and backend != 'numpy'
+        self.quantization = quantization if backend == 'numpy' else None
+        self.index_type = index_type if backend == 'faiss' else None
+        self.index_string = index_string if backend == 'faiss' else None
+        if self.index_string:
+            self.index_type = 'custom'
         
         # NumPy storage
         self.embeddings = None
         
-        # FAISS index
+        # int8 storage (per-row scales map int8 values back to the unit-norm floats)
+        self.embeddings_i8 = None
+        self.scales = None
+        
+        # Sign bits packed 8 per byte, for the binary Hamming pre-pass
+        self.embeddings_bin = None
+        
+        # Document texts as one UTF-8 blob plus byte offset table (see pack_texts);
+        # packed in memory by build(), memory-mapped from disk by load()
+        self.text_offsets = None
+        self.text_blob = None
+        
+        # FAISS index (GPU resources are kept alive for the lifetime of the index)
         self.faiss_index = None
+        self._gpu_resources = None
+        # True while faiss_index is memory-mapped read-only from the saved file
+        self._readonly = False
+        # True when the FAISS backend dropped its NumPy copy of the embeddings
+        # after load(); the saved embeddings file is then still current
+        self._embeddings_on_disk = False
+        
+        # torch backend: device-resident copy of the embeddings
+        self.embeddings_device = None
+        
+        # Per-document metadata as arrays: doc_ids, and languages as codes into
+        # metadata['lang_vocab']
+        self.doc_ids = np.empty(0, dtype=str)
+        self.lang_codes = np.empty(0, dtype=np.uint8)
         
         # Metadata
         self.metadata = {
-            'doc_ids': [],
-            'languages': [],
-            'doc_texts': [],
+            'lang_vocab': [],
             'num_documents': 0,
             'embedding_dim': 0,
-            'backend': backend
+            'backend': backend,
+            'quantization': self.quantization,
+            'index_type': self.index_type
         }
         
         logger.info(f"Initialized VectorIndex with backend: {backend}")
-        if self.use_gpu:
+        if self.use_gpu and backend == 'torch':
+            if torch.cuda.is_available():
+                logger.info(f"GPU enabled for torch (GPUs available: {torch.cuda.device_count()})")
+            else:
+                logger.warning("GPU requested but not available. Falling back to CPU.")
+                self.use_gpu = False
+        elif self.use_gpu:
             if FAISS_AVAILABLE and faiss.get_num_gpus() > 0:
                 logger.info(f"GPU enabled for FAISS (GPUs available: {faiss.get_num_gpus()})")
             else:
@@ -95,21 +250,50 @@ class VectorIndex:
             assert len(doc_texts) == embeddings.shape[0], \
                 "Mismatch between number of embeddings and document texts"
         
-        # Store embeddings (always keep for NumPy compatibility and metadata)
-        self.embeddings = embeddings
+        # Store embeddings (always keep for NumPy compatibility and metadata) in an
+        # anonymous mapping rather than the caller's heap-allocated array, and
+        # establish the unit-norm invariant on that copy once
+        self.embeddings = self._alloc_mmap(embeddings.shape, np.float32)
+        self.embeddings[...] = embeddings
+        self._normalize_in_place(self.embeddings)
         
         # Build FAISS index if using FAISS backend
         if self.backend == 'faiss':
-            self._build_faiss_index(embeddings)
+            self._build_faiss_index(self.embeddings)
+        elif self.backend == 'torch':
+            self._to_torch_device()
+        
+        # Quantize for the int8 NumPy search path
+        if self.quantization == 'int8':
+            self.embeddings_i8, self.scales = self._quantize_int8(self.embeddings)
+            logger.info(f"Quantized embeddings to int8 ({self.embeddings_i8.nbytes / 1e6:.1f} MB)")
+        elif self.quantization == 'binary':
+            self.embeddings_bin = self._pack_signs(self.embeddings)
+            logger.info(f"Packed embedding signs ({self.embeddings_bin.nbytes / 1e6:.1f} MB)")
         
-        # Store metadata
+        # An exact FAISS index (flat, or HNSW over flat storage) holds the very same
+        # float32 vectors; drop the duplicate, save() reads them back via reconstruct_n
+        self._embeddings_on_disk = False
+        if self.backend == 'faiss' and self.index_type in ('flat', 'hnsw'):
+            self.embeddings = None
+        
+        # Store metadata (texts are kept separately so the metadata stays small)
+        if doc_texts is not None:
+            self.text_blob, self.text_offsets = pack_texts(doc_texts)
+        else:
+            self.text_blob, self.text_offsets = None, None
+        self.doc_ids = np.asarray(doc_ids, dtype=str)
+        lang_vocab = sorted(set(languages))
+        self.lang_codes = self._encode_languages(languages, lang_vocab)
         self.metadata = {
-            'doc_ids': doc_ids,
-            'languages': languages,
-            'doc_texts': doc_texts if doc_texts is not None else [],
+            'lang_vocab': lang_vocab,
             'num_documents': len(doc_ids),
             'embedding_dim': embeddings.shape[1],
-            'backend': self.backend
+            'backend': self.backend,
+            'quantization': self.quantization,
+            'index_type': self.index_type,
+            'index_string': self.index_string,
+            'normalized': True
         }
         
         logger.info(f"Index built with {self.metadata['num_documents']} documents using {self.backend} backend")
@@ -124,62 +308,398 @@ class VectorIndex:
         if not FAISS_AVAILABLE:
             raise ImportError("FAISS not available")
         
-        dim = embeddings.shape[1]
-        embeddings_float32 = embeddings.astype('float32')
+        self._cap_faiss_threads()
+        num_vectors, dim = embeddings.shape
+        embeddings_float32 = np.ascontiguousarray(embeddings, dtype=np.float32)
+        
+        # All index types use the inner product metric, i.e. cosine similarity
+        # on the (already normalized) embeddings
+        logger.info(f"Building FAISS {self.index_type} index (dimension: {dim})...")
+        cpu_index = self._create_faiss_index(dim, num_vectors)
+        
+        # IVF-based indexes learn their coarse/product quantizers first
+        if not cpu_index.is_trained:
+            logger.info(f"Training FAISS index on {num_vectors} vectors...")
+            cpu_index.train(embeddings_float32)
         
-        # Use IndexFlatIP for exact cosine similarity (inner product)
-        # Embeddings should already be normalized
-        logger.info(f"Building FAISS index (dimension: {dim})...")
+        # Add embeddings to index
+        cpu_index.add(embeddings_float32)
+        self._set_search_params(cpu_index)
+        logger.info(f"Added {num_vectors} vectors to FAISS index")
         
         if self.use_gpu:
-            try:
-                # GPU index
-                res = faiss.StandardGpuResources()
-                cpu_index = faiss.IndexFlatIP(dim)
-                self.faiss_index = faiss.index_cpu_to_gpu(res, 0, cpu_index)
-                logger.info("FAISS index created on GPU")
-            except Exception as e:
-                logger.warning(f"Failed to create GPU index: {e}. Falling back to CPU.")
-                self.faiss_index = faiss.IndexFlatIP(dim)
-                self.use_gpu = False
+            self.faiss_index = self._to_gpu(cpu_index)
         else:
-            # CPU index
-            self.faiss_index = faiss.IndexFlatIP(dim)
+            self.faiss_index = cpu_index
             logger.info("FAISS index created on CPU")
+        self._readonly = False
+    
+    def _create_faiss_index(self, dim: int, num_vectors: int):
+        """
+        Create an empty FAISS index of the configured type.
         
-        # Add embeddings to index
-        self.faiss_index.add(embeddings_float32)
-        logger.info(f"Added {embeddings.shape[0]} vectors to FAISS index")
+        Args:
+            dim: Embedding dimension
+            num_vectors: Number of vectors that will be added (used to size IVF lists)
+        
+        Returns:
+            Untrained/empty FAISS index using the inner product metric
+        """
+        if self.index_string:
+            logger.info(f"Creating FAISS index from factory string '{self.index_string}'")
+            return faiss.index_factory(dim, self.index_string, faiss.METRIC_INNER_PRODUCT)
+        
+        if self.index_type == 'auto':
+            # Exhaustive search is fast enough for small corpora
+            self.index_type = 'flat' if num_vectors <= AUTO_ANN_THRESHOLD else 'hnsw'
+            logger.info(f"Auto-selected '{self.index_type}' FAISS index for {num_vectors} vectors")
+        
+        if self.index_type == 'hnsw':
+            index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+            return index
+        
+        if self.index_type == 'sq8':
+            # One byte per dimension, per-dimension ranges learned in train()
+            return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit,
+                                              faiss.METRIC_INNER_PRODUCT)
+        
+        if self.index_type in ('ivfflat', 'ivfsq8'):
+            nlist = self._ivf_nlist(num_vectors)
+            if num_vectors < nlist:
+                logger.warning(f"Cannot train IVF with {nlist} lists on N={num_vectors}. "
+                               f"Falling back to flat index.")
+                self.index_type = 'flat'
+                return faiss.IndexFlatIP(dim)
+            quantizer = faiss.IndexFlatIP(dim)
+            if self.index_type == 'ivfsq8':
+                return faiss.IndexIVFScalarQuantizer(quantizer, dim, nlist, faiss.ScalarQuantizer.QT_8bit,
+                                                     faiss.METRIC_INNER_PRODUCT)
+            return faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        
+        if self.index_type == 'ivfpq':
+            nlist = self._ivf_nlist(num_vectors)
+            # PQ codebooks need at least 2^nbits training points per sub-quantizer
+            if num_vectors < max(nlist, 2 ** IVFPQ_NBITS) or dim % IVFPQ_M != 0:
+                logger.warning(f"Cannot train IVF-PQ (N={num_vectors}, dim={dim}, M={IVFPQ_M}). "
+                               f"Falling back to flat index.")
+                self.index_type = 'flat'
+                return faiss.IndexFlatIP(dim)
+            quantizer = faiss.IndexFlatIP(dim)
+            return faiss.IndexIVFPQ(quantizer, dim, nlist, IVFPQ_M, IVFPQ_NBITS,
+                                    faiss.METRIC_INNER_PRODUCT)
+        
+        if self.index_type == 'ivfpqfs':
+            # 4-bit PQ codes laid out in blocks for SIMD in-register lookup tables
+            nlist = self._ivf_nlist(num_vectors)
+            if num_vectors < nlist or dim % IVFPQ_FS_M != 0:
+                logger.warning(f"Cannot train IVF-PQ FastScan (N={num_vectors}, dim={dim}, "
+                               f"M={IVFPQ_FS_M}). Falling back to flat index.")
+                self.index_type = 'flat'
+                return faiss.IndexFlatIP(dim)
+            return faiss.index_factory(dim, f"IVF{nlist},PQ{IVFPQ_FS_M}x4fs", faiss.METRIC_INNER_PRODUCT)
+        
+        # Exact search
+        return faiss.IndexFlatIP(dim)
+    
+    @staticmethod
+    def _ivf_nlist(num_vectors: int) -> int:
+        """Number of IVF lists: IVF_NLIST, or 4*sqrt(N) with ~39 training points per list."""
+        if IVF_NLIST:
+            return IVF_NLIST
+        return max(1, min(int(4 * np.sqrt(num_vectors)), num_vectors // 39))
+    
+    @staticmethod
+    def _set_search_params(index) -> None:
+        """
+        Apply query-time parameters to an HNSW or IVF-based FAISS index.
+        
+        Args:
+            index: CPU FAISS index (no-op for index types without search parameters)
+        """
+        if isinstance(index, faiss.IndexHNSW):
+            index.hnsw.efSearch = HNSW_EF_SEARCH
+        
+        ivf_index = faiss.try_extract_index_ivf(index)
+        if ivf_index is not None:
+            ivf_index.nprobe = IVF_NPROBE
+    
+    @staticmethod
+    def _encode_languages(languages: List[str], lang_vocab: List[str]) -> np.ndarray:
+        """Map language names to their positions in lang_vocab (smallest fitting uint)."""
+        code_of = {lang: code for code, lang in enumerate(lang_vocab)}
+        return np.fromiter((code_of[lang] for lang in languages),
+                           dtype=np.min_scalar_type(max(len(lang_vocab) - 1, 0)), count=len(languages))
+    
+    @staticmethod
+    def _pack_signs(embeddings: np.ndarray) -> np.ndarray:
+        """
+        Binary-quantize embeddings to their sign bits, packed 8 dimensions per byte.
+        
+        Args:
+            embeddings: Float embeddings (n, dim) or (dim,)
+        
+        Returns:
+            uint8 array of shape (n, ceil(dim / 8))
+        """
+        embeddings = np.atleast_2d(embeddings)
+        packed = np.empty((embeddings.shape[0], (embeddings.shape[1] + 7) // 8), dtype=np.uint8)
+        for start in range(0, len(packed), UPCAST_BLOCK_SIZE):
+            block = embeddings[start:start + UPCAST_BLOCK_SIZE]
+            packed[start:start + len(block)] = np.packbits(block > 0, axis=1)
+        return packed
+    
+    @staticmethod
+    def _quantize_int8(embeddings: np.ndarray) -> tuple:
+        """
+        Linearly quantize embeddings to int8 with one scale per row.
+        
+        Args:
+            embeddings: Float embeddings (n, dim) or (dim,)
+        
+        Returns:
+            Tuple of (int8 embeddings, float32 scales) where float ≈ int8 / scale
+        """
+        embeddings = np.atleast_2d(embeddings).astype(np.float32, copy=False)
+        max_abs = np.abs(embeddings).max(axis=1)
+        scales = (127.0 / np.maximum(max_abs, 1e-12)).astype(np.float32)
+        quantized = np.round(embeddings * scales[:, None]).astype(np.int8)
+        return quantized, scales
+    
+    @staticmethod
+    def _alloc_mmap(shape: tuple, dtype) -> np.ndarray:
+        """
+        Allocate a zeroed array backed by an anonymous memory mapping.
+        
+        Unlike a heap allocation, the mapping is returned to the kernel as soon as
+        the array is freed, and on Linux it is advised to use transparent huge
+        pages, which cuts TLB misses when scanning the embedding matrix.
+        
+        Args:
+            shape: Array shape
+            dtype: Array dtype
+        
+        Returns:
+            Writable NumPy array viewing the mapping
+        """
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        # mmap cannot map zero bytes; an empty index still gets a valid buffer
+        buf = mmap.mmap(-1, max(nbytes, 1))
+        if hasattr(mmap, 'MADV_HUGEPAGE'):
+            try:
+                buf.madvise(mmap.MADV_HUGEPAGE)
+            except OSError:
+                pass  # THP disabled in this kernel
+        return np.frombuffer(buf, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+    
+    def _to_gpu(self, cpu_index):
+        """
+        Clone a CPU FAISS index onto the available GPU(s).
+        
+        Uses all visible GPUs (sharding the search) when more than one is present.
+        On FAISS builds with NVIDIA cuVS (1.10+), the clone uses the cuVS
+        implementations for faster IVF build and search. With FAISS_GPU_FLOAT16
+        the vectors are stored as float16 on the device (half the memory traffic
+        per search; vectors are still added and queried in float32). Falls back
+        to the CPU index if the transfer fails.
+        
+        Args:
+            cpu_index: FAISS index living on the CPU
+        
+        Returns:
+            GPU index, or the original CPU index on failure
+        """
+        try:
+            num_gpus = faiss.get_num_gpus()
+            if num_gpus > 1:
+                co = faiss.GpuMultipleClonerOptions()
+                co.shard = True
+                co.useFloat16 = FAISS_GPU_FLOAT16
+                self._enable_cuvs(co)
+                gpu_index = faiss.index_cpu_to_all_gpus(cpu_index, co)
+            else:
+                co = faiss.GpuClonerOptions()
+                co.useFloat16 = FAISS_GPU_FLOAT16
+                self._enable_cuvs(co)
+                self._gpu_resources = faiss.StandardGpuResources()
+                gpu_index = faiss.index_cpu_to_gpu(self._gpu_resources, 0, cpu_index, co)
+            logger.info(f"FAISS index placed on GPU (GPUs used: {num_gpus})")
+            return gpu_index
+        except Exception as e:
+            logger.warning(f"Failed to move index to GPU: {e}. Falling back to CPU.")
+            self.use_gpu = False
+            return cpu_index
+    
+    @staticmethod
+    def _cap_faiss_threads() -> None:
+        """Limit FAISS's OpenMP pool to MAX_SEARCH_THREADS (a lower OMP_NUM_THREADS still wins)."""
+        faiss.omp_set_num_threads(min(MAX_SEARCH_THREADS, faiss.omp_get_max_threads()))
+    
+    @staticmethod
+    def _enable_cuvs(cloner_options) -> None:
+        """Route GPU cloning through cuVS when this FAISS build supports it."""
+        if hasattr(cloner_options, 'use_cuvs'):
+            cloner_options.use_cuvs = True
+    
+    def _read_faiss_index_mmap(self, faiss_path: Path):
+        """
+        Read a FAISS index memory-mapped and read-only.
+        
+        The codes are paged in from the file on demand instead of being copied
+        onto the heap, so cold start is fast and the index is not resident twice
+        (heap + page cache). Falls back to a regular read on FAISS builds that
+        cannot map the given index type.
+        
+        Args:
+            faiss_path: Path of the saved FAISS index
+        
+        Returns:
+            CPU FAISS index
+        """
+        try:
+            index = faiss.read_index(str(faiss_path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+            self._readonly = True
+            return index
+        except (RuntimeError, AttributeError) as e:
+            logger.warning(f"Memory-mapped FAISS load failed ({e}); reading into RAM")
+            self._readonly = False
+            return faiss.read_index(str(faiss_path))
     
-    def save(self) -> None:
-        """Save the index and metadata to disk."""
-        if self.embeddings is None:
+    def save(self, compress: bool = False) -> None:
+        """
+        Save the index and metadata to disk.
+        
+        Args:
+            compress: If True, write embeddings as a compressed .npz (smaller on disk,
+                      but must be fully decompressed on load). By default embeddings are
+                      written as a raw .npy that load() memory-maps.
+        """
+        if self.embeddings is None and self.faiss_index is None:
             raise ValueError("No index to save. Build the index first.")
         
-        # Save embeddings as compressed numpy file (always save for compatibility)
-        embeddings_path = self.index_dir / INDEX_FILENAME
-        np.savez_compressed(embeddings_path, embeddings=self.embeddings)
-        logger.info(f"Saved embeddings to {embeddings_path}")
+        # GPU indexes (sharded ones in particular) can neither be written nor
+        # reconstruct vectors; both go through a CPU copy
+        cpu_index = None
+        if self.faiss_index is not None:
+            cpu_index = faiss.index_gpu_to_cpu(self.faiss_index) if self.use_gpu else self.faiss_index
+        
+        # Save embeddings (always save for compatibility) in the storage dtype;
+        # remove the other format so load() never picks up stale embeddings
+        raw_path = self.index_dir / EMBEDDINGS_FILENAME
+        compressed_path = self.index_dir / INDEX_FILENAME
+        if self.embeddings is None and self._embeddings_on_disk:
+            logger.info("Embeddings unchanged since load, keeping them on disk")
+        else:
+            stored_embeddings = self._stored_embeddings(cpu_index)
+            if compress:
+                embeddings_path, stale_path = compressed_path, raw_path
+                np.savez_compressed(embeddings_path, embeddings=stored_embeddings)
+            else:
+                embeddings_path, stale_path = raw_path, compressed_path
+                # load() memory-maps this file, possibly into this very instance
+                self._replace_file(embeddings_path, lambda path: np.save(path, stored_embeddings))
+            stale_path.unlink(missing_ok=True)
+            logger.info(f"Saved embeddings to {embeddings_path}")
         
         # Save FAISS index if using FAISS backend
         if self.backend == 'faiss' and self.faiss_index is not None:
             faiss_path = self.index_dir / FAISS_INDEX_FILENAME
             
-            # Convert GPU index to CPU before saving
-            if self.use_gpu:
-                cpu_index = faiss.index_gpu_to_cpu(self.faiss_index)
-                faiss.write_index(cpu_index, str(faiss_path))
+            if self._readonly:
+                # Memory-mapped from this very file and never mutated, so it is
+                # already up to date; rewriting it would truncate the mapping
+                logger.info(f"FAISS index unchanged since load, keeping {faiss_path}")
             else:
-                faiss.write_index(self.faiss_index, str(faiss_path))
-            
-            logger.info(f"Saved FAISS index to {faiss_path}")
+                self._replace_file(faiss_path, lambda path: faiss.write_index(cpu_index, str(path)))
+                logger.info(f"Saved FAISS index to {faiss_path}")
+        
+        # Save int8 embeddings if quantized, else drop those of a previous index
+        quantized_path = self.index_dir / QUANTIZED_INDEX_FILENAME
+        if self.embeddings_i8 is not None:
+            np.savez(quantized_path, embeddings=self.embeddings_i8, scales=self.scales)
+            logger.info(f"Saved int8 embeddings to {quantized_path}")
+        else:
+            quantized_path.unlink(missing_ok=True)
+        
+        # Save document texts as a UTF-8 blob plus a byte offset table for random access
+        texts_path = self.index_dir / DOC_TEXTS_FILENAME
+        offsets_path = self.index_dir / DOC_TEXTS_OFFSETS_FILENAME
+        if self.text_offsets is not None:
+            # Both files may be memory-mapped by this very instance
+            self._replace_file(texts_path, self.text_blob.tofile)
+            self._replace_file(offsets_path, lambda path: np.save(path, self.text_offsets))
+            logger.info(f"Saved {len(self.text_offsets) - 1} document texts to {texts_path}")
+        else:
+            # Built without texts: drop texts left over from a previous index
+            texts_path.unlink(missing_ok=True)
+            offsets_path.unlink(missing_ok=True)
+        
+        # Save per-document metadata as arrays, the rest as (small) JSON
+        np.savez(self.index_dir / DOC_META_FILENAME, doc_ids=self.doc_ids, lang_codes=self.lang_codes)
         
-        # Save metadata as JSON
         metadata_path = self.index_dir / METADATA_FILENAME
         with open(metadata_path, 'w', encoding='utf-8') as f:
             json.dump(self.metadata, f, ensure_ascii=False, indent=2)
         logger.info(f"Saved metadata to {metadata_path}")
     
+    def _stored_embeddings(self, cpu_index=None) -> np.ndarray:
+        """
+        Embeddings in the on-disk dtype.
+        
+        Args:
+            cpu_index: CPU copy of the FAISS index, read back when no NumPy copy is kept
+        
+        Returns:
+            Embedding matrix (n_docs, dim) in EMBEDDING_STORAGE_DTYPE
+        """
+        if self.embeddings is not None:
+            return self.embeddings.astype(EMBEDDING_STORAGE_DTYPE, copy=False)
+        
+        num_docs = cpu_index.ntotal
+        stored = np.empty((num_docs, cpu_index.d), dtype=EMBEDDING_STORAGE_DTYPE)
+        for start in range(0, num_docs, UPCAST_BLOCK_SIZE):
+            stop = min(start + UPCAST_BLOCK_SIZE, num_docs)
+            stored[start:stop] = cpu_index.reconstruct_n(start, stop - start)
+        return stored
+    
+    @staticmethod
+    def _replace_file(path: Path, write) -> None:
+        """
+        Write a file under a temporary name and atomically swap it into place.
+        
+        A memory-mapped index keeps reading the old inode instead of having the
+        file truncated underneath it.
+        
+        Args:
+            path: Destination path
+            write: Callable writing the file contents to the path it is given
+        """
+        tmp_path = path.with_name(f".tmp-{path.name}")
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    
+    @staticmethod
+    def _assert_normalized(embeddings: np.ndarray, atol: float = 1e-3) -> None:
+        """
+        Check the unit-norm invariant on an evenly spaced sample of rows.
+        
+        Args:
+            embeddings: Document embeddings (n_docs, dim)
+            atol: Allowed deviation of the L2 norm from 1
+        
+        Raises:
+            ValueError: If any sampled embedding is not unit length
+        """
+        if len(embeddings) == 0:
+            return
+        
+        rows = np.unique(np.linspace(0, len(embeddings) - 1, NORM_CHECK_SAMPLE_SIZE).astype(np.int64))
+        norms = np.linalg.norm(np.asarray(embeddings[rows], dtype=np.float32), axis=1)
+        if not np.allclose(norms, 1.0, atol=atol):
+            raise ValueError(f"Embeddings must be L2-normalized (sampled norms range "
+                             f"{norms.min():.4f}-{norms.max():.4f})")
+    
     def load(self) -> bool:
         """
         Load the index and metadata from disk.
@@ -187,19 +707,36 @@ class VectorIndex:
         Returns:
             True if loading was successful, False otherwise
         """
-        embeddings_path = self.index_dir / INDEX_FILENAME
+        raw_path = self.index_dir / EMBEDDINGS_FILENAME
+        compressed_path = self.index_dir / INDEX_FILENAME
         metadata_path = self.index_dir / METADATA_FILENAME
         
-        if not embeddings_path.exists() or not metadata_path.exists():
+        if not self.index_exists():
             logger.warning("Index files not found")
             return False
         
         try:
-            # Load embeddings
-            data = np.load(embeddings_path)
-            self.embeddings = data['embeddings']
+            # Load embeddings: memory-map the raw .npy so pages are read on demand,
+            # fall back to decompressing a .npz written by older versions or --compress
+            if raw_path.exists():
+                self.embeddings = np.load(raw_path, mmap_mode='r')
+            else:
+                with np.load(compressed_path) as data:
+                    stored = data['embeddings']
+                self.embeddings = self._alloc_mmap(stored.shape, stored.dtype)
+                self.embeddings[...] = stored
+                del stored
             logger.info(f"Loaded embeddings with shape {self.embeddings.shape}")
             
+            # Scoring needs C-contiguous float32 (or float16, upcast per block) to hit
+            # BLAS; convert anything else, e.g. float64 or Fortran-ordered files, once
+            if (self.embeddings.dtype not in (np.float32, np.float16)
+                    or not self.embeddings.flags.c_contiguous):
+                converted = self._alloc_mmap(self.embeddings.shape, np.float32)
+                converted[...] = self.embeddings
+                self.embeddings = converted
+            self._assert_normalized(self.embeddings)
+            
             # Load metadata
             with open(metadata_path, 'r', encoding='utf-8') as f:
                 self.metadata = json.load(f)
@@ -212,32 +749,95 @@ class VectorIndex:
                     logger.warning(f"Switching to {saved_backend} backend to match saved index")
                     self.backend = saved_backend
             
+            # Likewise the quantization the index was saved with
+            if 'quantization' in self.metadata:
+                saved_quantization = self.metadata['quantization']
+                if saved_quantization != self.quantization:
+                    logger.warning(f"Index was saved with quantization={saved_quantization}, "
+                                   f"using it instead of {self.quantization}")
+                    self.quantization = saved_quantization
+            
+            # Per-document metadata: older indexes store doc_ids/languages as JSON lists
+            if 'doc_ids' in self.metadata:
+                self.doc_ids = np.asarray(self.metadata.pop('doc_ids'), dtype=str)
+                languages = self.metadata.pop('languages')
+                self.metadata['lang_vocab'] = sorted(set(languages))
+                self.lang_codes = self._encode_languages(languages, self.metadata['lang_vocab'])
+            else:
+                with np.load(self.index_dir / DOC_META_FILENAME) as doc_meta:
+                    self.doc_ids = doc_meta['doc_ids']
+                    self.lang_codes = doc_meta['lang_codes']
+            
             logger.info(f"Loaded metadata for {self.metadata['num_documents']} documents")
             
+            # Document texts: older indexes embed them in the metadata JSON; otherwise
+            # the blob and offset table are mapped and get_text() slices on demand
+            offsets_path = self.index_dir / DOC_TEXTS_OFFSETS_FILENAME
+            texts_path = self.index_dir / DOC_TEXTS_FILENAME
+            legacy_texts = self.metadata.pop('doc_texts', None)
+            self.text_offsets = None
+            self.text_blob = None
+            if legacy_texts:
+                self.text_blob, self.text_offsets = pack_texts(legacy_texts)
+                del legacy_texts
+            elif offsets_path.exists() and texts_path.exists():
+                self.text_offsets = np.load(offsets_path, mmap_mode='r')
+                # np.memmap cannot map an empty file (corpus of empty texts)
+                if texts_path.stat().st_size > 0:
+                    self.text_blob = np.memmap(texts_path, dtype=np.uint8, mode='r')
+                else:
+                    self.text_blob = np.empty(0, dtype=np.uint8)
+            
+            # Load (or derive) int8 embeddings for the quantized NumPy backend
+            if self.backend == 'numpy' and self.quantization == 'int8':
+                quantized_path = self.index_dir / QUANTIZED_INDEX_FILENAME
+                if quantized_path.exists():
+                    with np.load(quantized_path) as quantized:
+                        self.embeddings_i8 = quantized['embeddings']
+                        self.scales = quantized['scales']
+                    logger.info("Loaded int8 embeddings")
+                if self.embeddings_i8 is None or len(self.embeddings_i8) != self.metadata['num_documents']:
+                    logger.info("int8 embeddings missing or stale. Quantizing loaded embeddings...")
+                    self.embeddings_i8, self.scales = self._quantize_int8(self.embeddings)
+            elif self.backend == 'numpy' and self.quantization == 'binary':
+                # One cheap pass over the embeddings; not worth a separate file
+                self.embeddings_bin = self._pack_signs(self.embeddings)
+            
             # Load FAISS index if using FAISS backend
             if self.backend == 'faiss':
                 faiss_path = self.index_dir / FAISS_INDEX_FILENAME
                 
                 if faiss_path.exists() and FAISS_AVAILABLE:
                     logger.info("Loading FAISS index...")
-                    cpu_index = faiss.read_index(str(faiss_path))
-                    
-                    # Move to GPU if requested
+                    self._cap_faiss_threads()
+                    # Move to GPU if requested (the clone copies the codes anyway)
                     if self.use_gpu and faiss.get_num_gpus() > 0:
-                        try:
-                            res = faiss.StandardGpuResources()
-                            self.faiss_index = faiss.index_cpu_to_gpu(res, 0, cpu_index)
-                            logger.info("FAISS index loaded on GPU")
-                        except Exception as e:
-                            logger.warning(f"Failed to load index on GPU: {e}. Using CPU.")
-                            self.faiss_index = cpu_index
-                            self.use_gpu = False
+                        cpu_index = faiss.read_index(str(faiss_path))
+                        self.index_type = self.metadata.get('index_type', 'flat')
+                        self.index_string = self.metadata.get('index_string')
+                        self._set_search_params(cpu_index)
+                        self.faiss_index = self._to_gpu(cpu_index)
                     else:
-                        self.faiss_index = cpu_index
+                        self.faiss_index = self._read_faiss_index_mmap(faiss_path)
+                        self.index_type = self.metadata.get('index_type', 'flat')
+                        self.index_string = self.metadata.get('index_string')
+                        self._set_search_params(self.faiss_index)
                         logger.info("FAISS index loaded on CPU")
+                    
+                    # Scores are cosine similarities only under the inner product on
+                    # normalized vectors; an L2 index would rank by distance instead
+                    if self.faiss_index.metric_type != faiss.METRIC_INNER_PRODUCT:
+                        raise ValueError("FAISS index must use the inner product metric "
+                                         f"(found metric_type={self.faiss_index.metric_type})")
+                    
+                    # FAISS answers every search, so the NumPy copy is not needed
+                    self.embeddings = None
+                    self._embeddings_on_disk = True
                 else:
                     logger.warning("FAISS index file not found. Rebuilding from embeddings...")
                     self._build_faiss_index(self.embeddings)
+            elif self.backend == 'torch':
+                self._to_torch_device()
             
             return True
             
@@ -245,30 +845,214 @@ class VectorIndex:
             logger.error(f"Error loading index: {e}")
             return False
     
-    def search(self, query_embedding: np.ndarray, top_k: int = 10) -> tuple:
+    def search(self, query_embedding: np.ndarray, top_k: int = 10,
+               already_normalized: bool = True) -> tuple:
         """
         Search the index for documents most similar to the query.
         
         Args:
             query_embedding: Query embedding vector (1, embedding_dim) or (embedding_dim,)
             top_k: Number of top results to return
+            already_normalized: Set to False to L2-normalize the query first
+                                (MultilingualEmbedder output is already normalized)
         
         Returns:
             Tuple of (indices, scores) for top-k results
         """
-        if self.embeddings is None:
+        if self.embeddings is None and self.faiss_index is None:
             raise ValueError("No index loaded. Build or load an index first.")
         
+        if _is_tensor(query_embedding):
+            indices, scores = self.batch_search(query_embedding.reshape(1, -1), top_k=top_k,
+                                                already_normalized=already_normalized)
+            found = indices[0] >= 0
+            return indices[0][found], scores[0][found]
+        
         # Ensure query embedding is 2D
         if query_embedding.ndim == 1:
             query_embedding = query_embedding.reshape(1, -1)
         
+        if not already_normalized:
+            query_embedding = self._normalize(query_embedding)
+        
         # Use appropriate backend
         if self.backend == 'faiss' and self.faiss_index is not None:
             return self._search_faiss(query_embedding, top_k)
+        elif self.embeddings_device is not None:
+            indices, scores = self._search_torch(query_embedding[:1], top_k)
+            return indices[0], scores[0]
+        elif self.embeddings_i8 is not None:
+            return self._search_int8(query_embedding, top_k)
+        elif self.embeddings_bin is not None:
+            return self._search_binary(query_embedding, top_k)
         else:
             return self._search_numpy(query_embedding, top_k)
     
+    def batch_search(self, query_embeddings: np.ndarray, top_k: int = 10,
+                     already_normalized: bool = True) -> tuple:
+        """
+        Search the index for many queries at once.
+        
+        On the NumPy backend all queries are scored with matrix-matrix products
+        (multithreaded BLAS sgemm) over cache-sized blocks of the embedding matrix
+        instead of one sgemv per query; FAISS receives the whole query matrix in
+        a single search call.
+        
+        Args:
+            query_embeddings: Query embedding matrix (n_queries, embedding_dim); may
+                              also be a torch tensor, see accepts_device_queries
+            top_k: Number of top results to return per query
+            already_normalized: Set to False to L2-normalize the queries first
+        
+        Returns:
+            Tuple of (indices, scores) arrays with shape (n_queries, top_k). Rows with
+            fewer than top_k hits are padded with index -1 and score -inf.
+        """
+        if self.embeddings is None and self.faiss_index is None:
+            raise ValueError("No index loaded. Build or load an index first.")
+        
+        if _is_tensor(query_embeddings):
+            if not already_normalized:
+                query_embeddings = torch.nn.functional.normalize(query_embeddings.float(), p=2, dim=-1)
+            if self.accepts_device_queries:
+                return self._batch_search_device(query_embeddings, top_k)
+            query_embeddings = query_embeddings.float().cpu().numpy()
+        
+        query_embeddings = np.atleast_2d(query_embeddings)
+        if not already_normalized:
+            query_embeddings = self._normalize(query_embeddings)
+        
+        if self.backend == 'faiss' and self.faiss_index is not None:
+            return self._batch_search_faiss(query_embeddings, top_k)
+        if self.embeddings_device is not None:
+            return self._search_torch(query_embeddings, top_k)
+        if self.backend == 'numpy' and self.embeddings_i8 is None and self.embeddings_bin is None:
+            return self._batch_search_numpy(query_embeddings, top_k)
+        
+        # Other backends: search query by query and pad to a rectangular result
+        top_k = min(top_k, self.metadata['num_documents'])
+        all_indices = np.full((len(query_embeddings), top_k), -1, dtype=np.int64)
+        all_scores = np.full((len(query_embeddings), top_k), -np.inf, dtype=np.float32)
+        for row, query_embedding in enumerate(query_embeddings):
+            indices, scores = self.search(query_embedding, top_k=top_k)
+            all_indices[row, :len(indices)] = indices
+            all_scores[row, :len(scores)] = scores
+        
+        return all_indices, all_scores
+    
+    def _batch_search_numpy(self, query_embeddings: np.ndarray, top_k: int) -> tuple:
+        """
+        NumPy-based exact search for a batch of queries.
+        
+        The embedding matrix is scanned in blocks of SEARCH_BLOCK_SIZE rows; each
+        block is scored against all queries while it is cache-resident and merged
+        into a running top-k per query, so the full (n_queries, n_docs) score
+        matrix is never materialized.
+        
+        Args:
+            query_embeddings: Query embeddings (n_queries, dim)
+            top_k: Number of results per query
+        
+        Returns:
+            Tuple of (indices, scores), each (n_queries, top_k)
+        """
+        queries = np.ascontiguousarray(query_embeddings, dtype=np.float32)
+        num_docs = self.embeddings.shape[0]
+        top_k = min(top_k, num_docs)
+        
+        # Running top-k per query (unsorted), seeded empty
+        top_indices = np.empty((len(queries), 0), dtype=np.int64)
+        top_scores = np.empty((len(queries), 0), dtype=np.float32)
+        
+        for start in range(0, num_docs, SEARCH_BLOCK_SIZE):
+            block = np.asarray(self.embeddings[start:start + SEARCH_BLOCK_SIZE], dtype=np.float32)
+            # One GEMM per block: (n_queries, dim) @ (dim, block_rows)
+            block_scores = queries @ block.T
+            
+            # Merge the block into the running top-k with a partial selection
+            scores = np.concatenate([top_scores, block_scores], axis=1)
+            indices = np.concatenate([
+                top_indices,
+                np.broadcast_to(np.arange(start, start + len(block)), block_scores.shape)
+            ], axis=1)
+            if scores.shape[1] > top_k:
+                keep = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+                scores = np.take_along_axis(scores, keep, axis=1)
+                indices = np.take_along_axis(indices, keep, axis=1)
+            top_scores, top_indices = scores, indices
+        
+        # Sort only the k survivors
+        order = np.argsort(-top_scores, axis=1)
+        top_indices = np.take_along_axis(top_indices, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        
+        return top_indices, top_scores
+    
+    def _similarities(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Inner products of all document embeddings with one or more queries.
+        
+        float32 embeddings go straight to BLAS (sgemv for one query, sgemm for a
+        batch). Embeddings stored at lower precision (e.g. a float16 memmap) are
+        upcast one block of rows at a time, so no full float32 copy is made.
+        
+        Args:
+            queries: Contiguous float32 query vector (dim,) or matrix (n_queries, dim)
+        
+        Returns:
+            Similarities of shape (n_docs,) or (n_docs, n_queries)
+        """
+        if self.embeddings.dtype == np.float32:
+            return np.matmul(self.embeddings, queries.T)
+        
+        num_docs = self.embeddings.shape[0]
+        similarities = np.empty((num_docs,) + queries.shape[:-1], dtype=np.float32)
+        for start in range(0, num_docs, UPCAST_BLOCK_SIZE):
+            block = self.embeddings[start:start + UPCAST_BLOCK_SIZE].astype(np.float32)
+            similarities[start:start + len(block)] = np.matmul(block, queries.T)
+        
+        return similarities
+    
+    @staticmethod
+    def _normalize_in_place(vectors: np.ndarray) -> None:
+        """L2-normalize the rows of a C-contiguous float32 array in place."""
+        if FAISS_AVAILABLE:
+            faiss.normalize_L2(vectors)
+            return
+        for start in range(0, len(vectors), UPCAST_BLOCK_SIZE):
+            block = vectors[start:start + UPCAST_BLOCK_SIZE]
+            block /= np.maximum(np.linalg.norm(block, axis=1, keepdims=True), 1e-12)
+    
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """L2-normalize the rows of a 2D float32 array."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    
+    @staticmethod
+    def _top_k(similarities: np.ndarray, top_k: int) -> tuple:
+        """
+        Select the top-k entries of a similarity vector, sorted by descending score.
+        
+        Args:
+            similarities: 1D array of similarity scores
+            top_k: Number of results
+        
+        Returns:
+            Tuple of (indices, scores)
+        """
+        # Partial selection of the top-k (O(N)), then sort only those k; when every
+        # entry is requested there is nothing to select and a plain sort suffices
+        top_k = min(top_k, len(similarities))
+        if top_k < len(similarities):
+            candidates = np.argpartition(-similarities, top_k - 1)[:top_k]
+        else:
+            candidates = np.arange(len(similarities))
+        top_indices = candidates[np.argsort(-similarities[candidates])]
+        top_scores = similarities[top_indices]
+        
+        return top_indices, top_scores
+    
     def _search_numpy(self, query_embedding: np.ndarray, top_k: int) -> tuple:
         """
         NumPy-based exact search.
@@ -280,15 +1064,171 @@ class VectorIndex:
         Returns:
             Tuple of (indices, scores)
         """
-        # Compute cosine similarity (embeddings are already normalized)
-        similarities = np.dot(self.embeddings, query_embedding.T).flatten()
+        top_k = min(top_k, len(self.embeddings))
+        if top_k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
         
-        # Get top-k indices
-        top_k = min(top_k, len(similarities))
-        top_indices = np.argsort(similarities)[::-1][:top_k]
-        top_scores = similarities[top_indices]
+        # Cosine similarity is the raw inner product (unit-norm invariant)
+        query = np.ascontiguousarray(query_embedding[0], dtype=np.float32)
         
-        return top_indices, top_scores
+        if NUMBA_AVAILABLE and self.embeddings.dtype in (np.float32, np.float16):
+            # One pass over the embeddings: score and select without an N-length buffer
+            return topk_dot(self.embeddings, query, top_k, block_size=UPCAST_BLOCK_SIZE)
+        
+        similarities = self._similarities(query)
+        
+        return self._top_k(similarities, top_k)
+    
+    def _to_torch_device(self) -> None:
+        """
+        Copy the embeddings to the torch backend's device.
+        
+        On GPU the matrix is staged block by block through page-locked host memory,
+        so each host-to-device copy is an async DMA transfer that overlaps the
+        staging of the next block.
+        """
+        device = torch.device('cuda' if self.use_gpu else 'cpu')
+        num_docs, dim = self.embeddings.shape
+        self.embeddings_device = torch.empty((num_docs, dim), dtype=torch.float32, device=device)
+        
+        pin = device.type == 'cuda'
+        staging = [torch.empty((UPCAST_BLOCK_SIZE, dim), dtype=torch.float32, pin_memory=pin)
+                   for _ in range(2 if pin else 1)]
+        for block_num, start in enumerate(range(0, num_docs, UPCAST_BLOCK_SIZE)):
+            block = np.asarray(self.embeddings[start:start + UPCAST_BLOCK_SIZE], dtype=np.float32)
+            buffer = staging[block_num % len(staging)][:len(block)]
+            if pin and block_num >= len(staging):
+                # Do not overwrite a staging buffer whose transfer may still be in flight
+                torch.cuda.current_stream().synchronize()
+            buffer.copy_(torch.from_numpy(block))
+            self.embeddings_device[start:start + len(block)].copy_(buffer, non_blocking=pin)
+        
+        if pin:
+            torch.cuda.current_stream().synchronize()
+        logger.info(f"Embeddings resident on {device} for torch search")
+    
+    def _search_torch(self, query_embeddings: np.ndarray, top_k: int) -> tuple:
+        """
+        Exact search with the embeddings resident on the torch device.
+        
+        Queries are scored in chunks of QUERY_BATCH_SIZE so the score matrix stays
+        bounded; torch.topk selects the results on the device and only the
+        (n_queries, top_k) results are copied back.
+        
+        Args:
+            query_embeddings: Query embeddings (n_queries, dim)
+            top_k: Number of results per query
+        
+        Returns:
+            Tuple of (indices, scores), each (n_queries, top_k)
+        """
+        top_k = min(top_k, self.embeddings_device.shape[0])
+        if _is_tensor(query_embeddings):
+            queries = query_embeddings.float()
+        else:
+            queries = torch.from_numpy(np.ascontiguousarray(query_embeddings, dtype=np.float32))
+        
+        all_indices, all_scores = [], []
+        with torch.inference_mode():
+            for start in range(0, len(queries), QUERY_BATCH_SIZE):
+                chunk = queries[start:start + QUERY_BATCH_SIZE].to(self.embeddings_device.device)
+                scores, indices = torch.topk(chunk @ self.embeddings_device.T, top_k, dim=1)
+                all_indices.append(indices.cpu().numpy())
+                all_scores.append(scores.cpu().numpy())
+        
+        return np.concatenate(all_indices), np.concatenate(all_scores)
+    
+    def _search_int8(self, query_embedding: np.ndarray, top_k: int) -> tuple:
+        """
+        Search over int8-quantized embeddings.
+        
+        Uses SimSIMD's native int8 dot product when available; otherwise
+        dequantizes the corpus block by block so only one block of float32
+        values is materialized at a time. The best INT8_RESCORE_CANDIDATES
+        documents are then rescored with the float embeddings, which removes
+        the quantization error from the final ranking and scores.
+        
+        Args:
+            query_embedding: Query embedding (1, dim)
+            top_k: Number of results
+        
+        Returns:
+            Tuple of (indices, scores)
+        """
+        query_i8, query_scale = self._quantize_int8(query_embedding)
+        
+        if SIMSIMD_AVAILABLE:
+            dots = np.asarray(simsimd.cdist(query_i8, self.embeddings_i8, metric='dot'))[0]
+        else:
+            query_f32 = query_i8[0].astype(np.float32)
+            dots = np.empty(self.embeddings_i8.shape[0], dtype=np.float32)
+            for start in range(0, len(dots), UPCAST_BLOCK_SIZE):
+                block = self.embeddings_i8[start:start + UPCAST_BLOCK_SIZE]
+                dots[start:start + len(block)] = block.astype(np.float32) @ query_f32
+        
+        # Undo both scales to recover the cosine similarity
+        similarities = (dots / (self.scales * query_scale[0])).astype(np.float32)
+        
+        num_candidates = min(max(top_k, INT8_RESCORE_CANDIDATES), len(similarities))
+        if not INT8_RESCORE_CANDIDATES or self.embeddings is None or num_candidates == len(similarities):
+            return self._top_k(similarities, top_k)
+        
+        candidates = np.argpartition(-similarities, num_candidates - 1)[:num_candidates]
+        return self._rescore(candidates, query_embedding[0], top_k)
+    
+    def _search_binary(self, query_embedding: np.ndarray, top_k: int) -> tuple:
+        """
+        Two-stage search: Hamming pre-pass over sign bits, then exact rescoring.
+        
+        The pre-pass reads 1 bit per dimension instead of 32 and keeps the
+        top_k * BINARY_RESCORE_MULTIPLIER closest documents; only those rows of
+        the float embeddings are read to compute the returned cosine scores.
+        
+        Args:
+            query_embedding: Query embedding (1, dim)
+            top_k: Number of results
+        
+        Returns:
+            Tuple of (indices, scores)
+        """
+        query = np.ascontiguousarray(query_embedding[0], dtype=np.float32)
+        query_bits = self._pack_signs(query)[0]
+        
+        num_docs = self.embeddings_bin.shape[0]
+        distances = np.empty(num_docs, dtype=np.uint16)
+        for start in range(0, num_docs, UPCAST_BLOCK_SIZE):
+            differing = np.bitwise_xor(self.embeddings_bin[start:start + UPCAST_BLOCK_SIZE], query_bits)
+            if hasattr(np, 'bitwise_count'):
+                counts = np.bitwise_count(differing).sum(axis=1, dtype=np.uint16)
+            else:
+                counts = _POPCOUNT_TABLE[differing].sum(axis=1, dtype=np.uint16)
+            distances[start:start + len(differing)] = counts
+        
+        num_candidates = min(top_k * BINARY_RESCORE_MULTIPLIER, num_docs)
+        if num_candidates < num_docs:
+            candidates = np.argpartition(distances, num_candidates - 1)[:num_candidates]
+        else:
+            candidates = np.arange(num_docs)
+        return self._rescore(candidates, query, top_k)
+    
+    def _rescore(self, candidates: np.ndarray, query: np.ndarray, top_k: int) -> tuple:
+        """
+        Score candidate rows exactly against the float embeddings and keep the top-k.
+        
+        Args:
+            candidates: Candidate document indices from a quantized pre-pass
+            query: Query embedding (dim,)
+            top_k: Number of results
+        
+        Returns:
+            Tuple of (indices, scores)
+        """
+        # Ascending row order keeps the gather sequential on a memory-mapped matrix
+        candidates = np.sort(candidates)
+        query = np.ascontiguousarray(query, dtype=np.float32)
+        scores = np.asarray(self.embeddings[candidates], dtype=np.float32) @ query
+        order, top_scores = self._top_k(scores, top_k)
+        return candidates[order], top_scores
     
     def _search_faiss(self, query_embedding: np.ndarray, top_k: int) -> tuple:
         """
@@ -305,15 +1245,75 @@ class VectorIndex:
             logger.warning("FAISS not available, falling back to NumPy")
             return self._search_numpy(query_embedding, top_k)
         
-        # Convert to float32 for FAISS
-        query_float32 = query_embedding.astype('float32')
+        # FAISS requires a C-contiguous float32 matrix
+        query_float32 = np.ascontiguousarray(query_embedding, dtype=np.float32)
         
         # Search
         top_k = min(top_k, self.faiss_index.ntotal)
         scores, indices = self.faiss_index.search(query_float32, top_k)
         
+        # Approximate indexes pad with -1 when fewer than top_k neighbors are found
+        found = indices[0] >= 0
+        
         # Return as 1D arrays
-        return indices[0], scores[0]
+        return indices[0][found], scores[0][found]
+    
+    def _batch_search_faiss(self, query_embeddings: np.ndarray, top_k: int) -> tuple:
+        """
+        FAISS search for a batch of queries in one call.
+        
+        Args:
+            query_embeddings: Query embeddings (n_queries, dim)
+            top_k: Number of results per query
+        
+        Returns:
+            Tuple of (indices, scores), each (n_queries, top_k), padded with -1 / -inf
+        """
+        queries = np.ascontiguousarray(query_embeddings, dtype=np.float32)
+        top_k = min(top_k, self.faiss_index.ntotal)
+        scores, indices = self.faiss_index.search(queries, top_k)
+        
+        # FAISS pads missing neighbors with -1 and a sentinel distance
+        scores[indices < 0] = -np.inf
+        return indices, scores
+    
+    @property
+    def accepts_device_queries(self) -> bool:
+        """
+        Whether batch_search() can take torch query tensors without a host copy.
+        
+        True for the torch backend and for a FAISS index on a single GPU (FAISS
+        reads the CUDA tensor in place); sharded multi-GPU indexes need host queries.
+        """
+        if self.embeddings_device is not None:
+            return True
+        return (FAISS_TORCH_AVAILABLE and self.backend == 'faiss' and self.use_gpu
+                and self.faiss_index is not None and hasattr(self.faiss_index, 'getDevice'))
+    
+    def _batch_search_device(self, query_embeddings, top_k: int) -> tuple:
+        """
+        Search with torch query tensors, keeping them on their device.
+        
+        Only the (n_queries, top_k) results are copied to the host, once.
+        
+        Args:
+            query_embeddings: Query embeddings as a torch tensor (n_queries, dim)
+            top_k: Number of results per query
+        
+        Returns:
+            Tuple of (indices, scores) NumPy arrays, padded with -1 / -inf
+        """
+        if self.embeddings_device is not None:
+            return self._search_torch(query_embeddings, top_k)
+        
+        device = torch.device('cuda', self.faiss_index.getDevice())
+        queries = query_embeddings.to(device=device, dtype=torch.float32).contiguous()
+        top_k = min(top_k, self.faiss_index.ntotal)
+        scores, indices = self.faiss_index.search(queries, top_k)
+        
+        indices, scores = indices.cpu().numpy(), scores.cpu().numpy()
+        scores[indices < 0] = -np.inf
+        return indices, scores
     
     def get_document_info(self, index: int) -> Dict[str, str]:
         """
@@ -326,18 +1326,39 @@ class VectorIndex:
             Dictionary with document metadata
         """
         result = {
-            'doc_id': self.metadata['doc_ids'][index],
-            'language': self.metadata['languages'][index]
+            'doc_id': str(self.doc_ids[index]),
+            'language': self.metadata['lang_vocab'][self.lang_codes[index]]
         }
         
         # Add text if available
-        if self.metadata.get('doc_texts') and index < len(self.metadata['doc_texts']):
-            result['text'] = self.metadata['doc_texts'][index]
+        text = self.get_text(index)
+        if text is not None:
+            result['text'] = text
         
         return result
     
+    def get_text(self, index: int, max_chars: Optional[int] = None) -> Optional[str]:
+        """
+        Get the text of a document at a specific index.
+        
+        After load() the text is sliced from the memory-mapped UTF-8 blob, so
+        document texts never have to be held in memory.
+        
+        Args:
+            index: Index of the document
+            max_chars: If set, only the first max_chars characters are read and decoded
+        
+        Returns:
+            Document text, or None if the index has no stored texts
+        """
+        if self.text_offsets is None or index >= len(self.text_offsets) - 1:
+            return None
+        
+        return unpack_text(self.text_blob, self.text_offsets, index, max_chars)
+    
     def index_exists(self) -> bool:
         """Check if index files exist on disk."""
-        embeddings_path = self.index_dir / INDEX_FILENAME
+        raw_path = self.index_dir / EMBEDDINGS_FILENAME
+        compressed_path = self.index_dir / INDEX_FILENAME
         metadata_path = self.index_dir / METADATA_FILENAME
-        return embeddings_path.exists() and metadata_path.exists()
+        return (raw_path.exists() or compressed_path.exists()) and metadata_path.exists()
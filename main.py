@@ -3,13 +3,20 @@ Main application for the Multilingual Information Retrieval System.
 """
 
 import argparse
+import functools
+import json
 import logging
+import queue
 import sys
+import threading
+import time
 from pathlib import Path
 
-from config import LANGUAGES, CORPUS_SAMPLE_SIZE, DEFAULT_TOP_K, DEFAULT_INDEX_BACKEND, USE_GPU_FOR_FAISS
+from config import (LANGUAGES, CORPUS_SAMPLE_SIZE, DEFAULT_TOP_K, DEFAULT_INDEX_BACKEND, INDEX_BACKENDS, USE_GPU_FOR_FAISS,
+                    FAISS_INDEX_TYPES, DEFAULT_FAISS_INDEX_TYPE, CACHE_DIR, TOKENIZED_CORPUS_FILENAME,
+                    QUERY_CACHE_SIZE, SERVE_MAX_BATCH, SERVE_MAX_LATENCY_MS)
 from data_loader import DataLoader
-from embedder import MultilingualEmbedder
+from embedder import get_embedder
 from indexer import VectorIndex
 from retriever import CrossLingualRetriever
 from evaluator import IREvaluator
@@ -21,21 +28,28 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def build_index(sample_size: int = None, force_rebuild: bool = False, backend: str = DEFAULT_INDEX_BACKEND, use_gpu: bool = USE_GPU_FOR_FAISS):
+def build_index(sample_size: int = None, force_rebuild: bool = False, backend: str = DEFAULT_INDEX_BACKEND, use_gpu: bool = USE_GPU_FOR_FAISS,
+                compress: bool = False, index_type: str = DEFAULT_FAISS_INDEX_TYPE,
+                cache_tokens: bool = False, index_string: str = None):
     """
     Build the multilingual vector index.
     
     Args:
         sample_size: Number of documents to sample (None for full corpus)
         force_rebuild: If True, rebuild even if index exists
-        backend: Indexing backend ('numpy' or 'faiss')
-        use_gpu: Use GPU for FAISS (only applicable if backend='faiss')
+        backend: Indexing backend ('numpy', 'faiss' or 'torch')
+        use_gpu: Use GPU for FAISS or torch (not applicable if backend='numpy')
+        compress: Save embeddings compressed (.npz) instead of memory-mappable .npy
+        index_type: FAISS index type (one of FAISS_INDEX_TYPES; only applicable if backend='faiss')
+        cache_tokens: Cache the tokenized corpus in CACHE_DIR and reuse it on the next build
+        index_string: FAISS index_factory string overriding index_type (only applicable if backend='faiss')
     """
     logger.info("Starting index building process...")
-    logger.info(f"Backend: {backend}, GPU: {use_gpu if backend == 'faiss' else 'N/A'}")
+    logger.info(f"Backend: {backend}, GPU: {use_gpu if backend == 'faiss' else 'N/A'}, "
+                f"Index type: {(index_string or index_type) if backend == 'faiss' else 'N/A'}")
     
     # Initialize components
-    index = VectorIndex(backend=backend, use_gpu=use_gpu)
+    index = VectorIndex(backend=backend, use_gpu=use_gpu, index_type=index_type, index_string=index_string)
     
     # Check if index already exists
     if index.index_exists() and not force_rebuild:
@@ -45,7 +59,7 @@ def build_index(sample_size: int = None, force_rebuild: bool = False, backend: s
     # Load data
     logger.info("Loading corpus data...")
     data_loader = DataLoader(languages=list(LANGUAGES.keys()))
-    corpus_docs = data_loader.load_corpus(sample_size=sample_size)
+    data_loader.load_corpus(sample_size=sample_size)
     
     corpus_texts = data_loader.get_corpus_texts()
     corpus_ids = data_loader.get_corpus_ids()
@@ -53,13 +67,19 @@ def build_index(sample_size: int = None, force_rebuild: bool = False, backend: s
     
     # Generate embeddings
     logger.info("Generating embeddings...")
-    embedder = MultilingualEmbedder()
-    embeddings = embedder.encode_corpus(corpus_texts)
+    embedder = get_embedder()
+    if cache_tokens:
+        embeddings = embedder.encode_corpus_cached(corpus_texts, CACHE_DIR / TOKENIZED_CORPUS_FILENAME)
+    else:
+        embeddings = embedder.encode_corpus(corpus_texts)
+    
+    # The model is not needed for indexing; free its (GPU) memory first
+    embedder.release()
     
     # Build and save index (with document texts)
     logger.info("Building index...")
     index.build(embeddings, corpus_ids, corpus_languages, corpus_texts)
-    index.save()
+    index.save(compress=compress)
     
     logger.info("✅ Index building complete!")
 
@@ -72,8 +92,8 @@ def search(query: str, top_k: int = DEFAULT_TOP_K, show_text: bool = True, backe
         query: Query text
         top_k: Number of results to return
         show_text: If True, display document text
-        backend: Indexing backend ('numpy' or 'faiss')
-        use_gpu: Use GPU for FAISS (only applicable if backend='faiss')
+        backend: Indexing backend ('numpy', 'faiss' or 'torch')
+        use_gpu: Use GPU for FAISS or torch (not applicable if backend='numpy')
     """
     logger.info("Starting search...")
     
@@ -84,13 +104,13 @@ def search(query: str, top_k: int = DEFAULT_TOP_K, show_text: bool = True, backe
         return
     
     # Initialize embedder and retriever
-    embedder = MultilingualEmbedder()
+    embedder = get_embedder()
     retriever = CrossLingualRetriever(embedder, index)
     
     # Document texts are now stored in the index, no need to reload corpus
     
     # Perform retrieval
-    results = retriever.retrieve(query, top_k=top_k, return_full_text=True)
+    results = retriever.retrieve(query, top_k=top_k, return_full_text=True, snippet_chars=300)
     
     # Display results
     retriever.print_results(results, max_text_length=300)
@@ -102,8 +122,8 @@ def interactive_search(top_k: int = DEFAULT_TOP_K, backend: str = DEFAULT_INDEX_
     
     Args:
         top_k: Number of results to return per query
-        backend: Indexing backend ('numpy' or 'faiss')
-        use_gpu: Use GPU for FAISS (only applicable if backend='faiss')
+        backend: Indexing backend ('numpy', 'faiss' or 'torch')
+        use_gpu: Use GPU for FAISS or torch (not applicable if backend='numpy')
     """
     logger.info("Loading index...")
     
@@ -114,9 +134,14 @@ def interactive_search(top_k: int = DEFAULT_TOP_K, backend: str = DEFAULT_INDEX_
         return
     
     # Initialize components
-    embedder = MultilingualEmbedder()
+    embedder = get_embedder()
     retriever = CrossLingualRetriever(embedder, index)
     
+    # Repeated queries skip the transformer forward pass entirely. Keyed on the
+    # exact (stripped) text: the model is case-sensitive, so folding case would
+    # change results
+    encode_query_cached = functools.lru_cache(maxsize=QUERY_CACHE_SIZE)(embedder.encode_query)
+    
     # Document texts are now stored in the index, no need to reload corpus
     
     print("\n" + "="*80)
@@ -148,18 +173,21 @@ def interactive_search(top_k: int = DEFAULT_TOP_K, backend: str = DEFAULT_INDEX_
                 continue
             
             # Retrieve and display results with text snippets
-            results = retriever.retrieve(query, top_k=top_k, return_full_text=True)
+            results = retriever.retrieve_by_embedding(encode_query_cached(query), top_k=top_k,
+                                                      return_full_text=True, snippet_chars=250)
             
-            print(f"\n📄 Top {len(results)} Results:")
-            print("=" * 80)
+            # Build the whole block and write it once instead of one print per line
+            lines = [f"\n📄 Top {len(results)} Results:", "=" * 80]
             for result in results:
-                print(f"\n[{result['rank']}] {result['language']} | Score: {result['score']:.4f}")
-                print(f"Doc ID: {result['doc_id']}")
+                lines.append(f"\n[{result['rank']}] {result['language']} | Score: {result['score']:.4f}")
+                lines.append(f"Doc ID: {result['doc_id']}")
                 if 'text' in result:
                     # Show first 250 characters
                     text_snippet = result['text'][:250].replace('\n', ' ').strip()
-                    print(f"Text: {text_snippet}...")
-                print("-" * 80)
+                    lines.append(f"Text: {text_snippet}...")
+                lines.append("-" * 80)
+            sys.stdout.write('\n'.join(lines) + '\n')
+            sys.stdout.flush()
             
         except KeyboardInterrupt:
             print("\n\nGoodbye!")
@@ -168,6 +196,73 @@ def interactive_search(top_k: int = DEFAULT_TOP_K, backend: str = DEFAULT_INDEX_
             logger.error(f"Error during search: {e}")
 
 
+def serve(top_k: int = DEFAULT_TOP_K, show_text: bool = False, backend: str = DEFAULT_INDEX_BACKEND,
+          use_gpu: bool = USE_GPU_FOR_FAISS):
+    """
+    Answer queries read line by line from stdin, keeping the model and index loaded.
+    
+    Each non-empty input line is one query; each answer is written as one JSON
+    line ({"query": ..., "results": [...]}) on stdout, in input order. Scripts
+    running many searches pay the model and index load once per session instead
+    of once per query. Queries arriving within SERVE_MAX_LATENCY_MS of each other
+    are coalesced (up to SERVE_MAX_BATCH) into one batched encode + search.
+    
+    Args:
+        top_k: Number of results to return per query
+        show_text: If True, include document text in results
+        backend: Indexing backend ('numpy', 'faiss' or 'torch')
+        use_gpu: Use GPU for FAISS or torch (not applicable if backend='numpy')
+    """
+    index = VectorIndex(backend=backend, use_gpu=use_gpu)
+    if not index.load():
+        logger.error("No index found. Please build the index first using: python main.py build")
+        return
+    
+    embedder = get_embedder()
+    retriever = CrossLingualRetriever(embedder, index)
+    logger.info("Ready; reading queries from stdin (one per line)")
+    
+    # A reader thread feeds stdin lines into a queue (None marks EOF), so the loop
+    # below can wait for more queries with a timeout
+    lines = queue.Queue()
+    
+    def read_stdin():
+        for line in sys.stdin:
+            lines.put(line)
+        lines.put(None)
+    
+    threading.Thread(target=read_stdin, daemon=True).start()
+    
+    eof = False
+    while not eof:
+        # Block for the first query, then collect whatever else arrives in time
+        batch = []
+        line = lines.get()
+        deadline = time.monotonic() + SERVE_MAX_LATENCY_MS / 1000
+        while line is not None:
+            if line.strip():
+                batch.append(line.strip())
+            if len(batch) >= SERVE_MAX_BATCH:
+                break
+            try:
+                line = lines.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+        eof = line is None
+        
+        if not batch:
+            continue
+        try:
+            all_results = retriever.batch_retrieve(batch, top_k=top_k, return_full_text=show_text)
+        except Exception as e:
+            logger.error(f"Error during search: {e}")
+            all_results = [[] for _ in batch]
+        
+        for query, results in zip(batch, all_results):
+            print(json.dumps({'query': query, 'results': results}, ensure_ascii=False))
+        sys.stdout.flush()
+
+
 def evaluate(languages: list = None, split: str = 'dev', max_queries: int = None, backend: str = DEFAULT_INDEX_BACKEND, use_gpu: bool = USE_GPU_FOR_FAISS):
     """
     Evaluate the retrieval system using nDCG@10 and Recall@100 metrics.
@@ -176,8 +271,8 @@ def evaluate(languages: list = None, split: str = 'dev', max_queries: int = None
         languages: List of languages to evaluate (default: all)
         split: Dataset split to use ('dev' or 'train')
         max_queries: Maximum number of queries per language (None for all)
-        backend: Indexing backend ('numpy' or 'faiss')
-        use_gpu: Use GPU for FAISS (only applicable if backend='faiss')
+        backend: Indexing backend ('numpy', 'faiss' or 'torch')
+        use_gpu: Use GPU for FAISS or torch (not applicable if backend='numpy')
     """
     logger.info("Starting evaluation...")
     
@@ -188,7 +283,7 @@ def evaluate(languages: list = None, split: str = 'dev', max_queries: int = None
         return
     
     # Initialize components
-    embedder = MultilingualEmbedder()
+    embedder = get_embedder()
     retriever = CrossLingualRetriever(embedder, index)
     
     # Initialize evaluator
@@ -220,7 +315,7 @@ def main():
         epilog="""
 Examples:
   # Build index with full corpus (NumPy backend)
-  python main.py build
+  python main.py build --backend numpy
 
   # Build index with FAISS backend (faster)
   python main.py build --backend faiss
@@ -228,17 +323,20 @@ Examples:
   # Build with FAISS and GPU acceleration
   python main.py build --backend faiss --gpu
 
+  # Build an approximate (HNSW graph) FAISS index for large corpora
+  python main.py build --backend faiss --index-type hnsw
+
   # Build index with sample of 5000 documents (for testing)
   python main.py build --sample-size 5000
 
   # Search with a specific query (NumPy backend)
-  python main.py search "What are the common foods in South India?"
+  python main.py search "What are the common foods in South India?" --backend numpy
 
   # Search with FAISS backend
   python main.py search "climate change" --backend faiss
 
   # Interactive search mode (NumPy backend)
-  python main.py interactive
+  python main.py interactive --backend numpy
 
   # Interactive mode with FAISS backend
   python main.py interactive --backend faiss
@@ -249,6 +347,9 @@ Examples:
   # Search and show document text
   python main.py search "climate change effects" --show-text --top-k 5
 
+  # Keep the model loaded and answer one query per stdin line (JSON lines out)
+  python main.py serve --backend faiss < queries.txt
+
   # Evaluate retrieval performance (nDCG@10 and Recall@100)
   python main.py evaluate
 
@@ -272,10 +373,19 @@ Examples:
     build_parser.add_argument('--force-rebuild', action='store_true',
                              help='Force rebuild even if index exists')
     build_parser.add_argument('--backend', type=str, default=DEFAULT_INDEX_BACKEND, 
-                             choices=['numpy', 'faiss'],
-                             help='Indexing backend (numpy for exact, faiss for fast)')
+                             choices=INDEX_BACKENDS,
+                             help='Indexing backend (numpy for exact, faiss for fast, torch for GPU-resident exact)')
     build_parser.add_argument('--gpu', action='store_true', default=USE_GPU_FOR_FAISS,
-                             help='Use GPU for FAISS (if available)')
+                             help='Use GPU for FAISS or torch (if available)')
+    build_parser.add_argument('--compress', action='store_true',
+                             help='Save embeddings compressed (smaller on disk, slower to load)')
+    build_parser.add_argument('--index-type', type=str, default=DEFAULT_FAISS_INDEX_TYPE,
+                             choices=FAISS_INDEX_TYPES,
+                             help='FAISS index type (flat for exact, sq8 for 8-bit exhaustive, hnsw/ivf* for approximate, auto by corpus size)')
+    build_parser.add_argument('--index-string', type=str, default=None,
+                             help='FAISS index_factory string, e.g. "IVF4096,PQ192x4fs" (overrides --index-type)')
+    build_parser.add_argument('--cache-tokens', action='store_true',
+                             help='Cache the tokenized corpus and reuse it when re-embedding the same corpus')
     
     # Search command
     search_parser = subparsers.add_parser('search', help='Search with a query')
@@ -285,20 +395,32 @@ Examples:
     search_parser.add_argument('--show-text', action='store_true',
                               help='Show document text in results')
     search_parser.add_argument('--backend', type=str, default=DEFAULT_INDEX_BACKEND,
-                              choices=['numpy', 'faiss'],
-                              help='Indexing backend (numpy for exact, faiss for fast)')
+                              choices=INDEX_BACKENDS,
+                              help='Indexing backend (numpy for exact, faiss for fast, torch for GPU-resident exact)')
     search_parser.add_argument('--gpu', action='store_true', default=USE_GPU_FOR_FAISS,
-                              help='Use GPU for FAISS (if available)')
+                              help='Use GPU for FAISS or torch (if available)')
     
     # Interactive command
     interactive_parser = subparsers.add_parser('interactive', help='Interactive search mode')
     interactive_parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K,
                                    help='Number of results to return per query')
     interactive_parser.add_argument('--backend', type=str, default=DEFAULT_INDEX_BACKEND,
-                                   choices=['numpy', 'faiss'],
-                                   help='Indexing backend (numpy for exact, faiss for fast)')
+                                   choices=INDEX_BACKENDS,
+                                   help='Indexing backend (numpy for exact, faiss for fast, torch for GPU-resident exact)')
     interactive_parser.add_argument('--gpu', action='store_true', default=USE_GPU_FOR_FAISS,
-                                   help='Use GPU for FAISS (if available)')
+                                   help='Use GPU for FAISS or torch (if available)')
+    
+    # Serve command
+    serve_parser = subparsers.add_parser('serve', help='Answer queries from stdin with the model kept loaded')
+    serve_parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K,
+                             help='Number of results to return per query')
+    serve_parser.add_argument('--show-text', action='store_true',
+                             help='Include document text in results')
+    serve_parser.add_argument('--backend', type=str, default=DEFAULT_INDEX_BACKEND,
+                             choices=INDEX_BACKENDS,
+                             help='Indexing backend (numpy for exact, faiss for fast, torch for GPU-resident exact)')
+    serve_parser.add_argument('--gpu', action='store_true', default=USE_GPU_FOR_FAISS,
+                             help='Use GPU for FAISS or torch (if available)')
     
     # Evaluate command
     evaluate_parser = subparsers.add_parser('evaluate', help='Evaluate retrieval performance')
@@ -309,21 +431,25 @@ Examples:
     evaluate_parser.add_argument('--max-queries', type=int, default=None,
                                 help='Maximum number of queries per language (default: all)')
     evaluate_parser.add_argument('--backend', type=str, default=DEFAULT_INDEX_BACKEND,
-                                choices=['numpy', 'faiss'],
-                                help='Indexing backend (numpy for exact, faiss for fast)')
+                                choices=INDEX_BACKENDS,
+                                help='Indexing backend (numpy for exact, faiss for fast, torch for GPU-resident exact)')
     evaluate_parser.add_argument('--gpu', action='store_true', default=USE_GPU_FOR_FAISS,
-                                help='Use GPU for FAISS (if available)')
+                                help='Use GPU for FAISS or torch (if available)')
     
     args = parser.parse_args()
     
     if args.command == 'build':
         build_index(sample_size=args.sample_size, force_rebuild=args.force_rebuild, 
-                   backend=args.backend, use_gpu=args.gpu)
+                   backend=args.backend, use_gpu=args.gpu, compress=args.compress,
+                   index_type=args.index_type, cache_tokens=args.cache_tokens,
+                   index_string=args.index_string)
     elif args.command == 'search':
         search(args.query, top_k=args.top_k, show_text=args.show_text,
               backend=args.backend, use_gpu=args.gpu)
     elif args.command == 'interactive':
         interactive_search(top_k=args.top_k, backend=args.backend, use_gpu=args.gpu)
+    elif args.command == 'serve':
+        serve(top_k=args.top_k, show_text=args.show_text, backend=args.backend, use_gpu=args.gpu)
     elif args.command == 'evaluate':
         evaluate(languages=args.languages, split=args.split, max_queries=args.max_queries,
                 backend=args.backend, use_gpu=args.gpu)
@@ -3,9 +3,11 @@ Retriever module for query processing and document retrieval.
 """
 
 import logging
+import sys
+import numpy as np
 from typing import List, Dict, Optional
 from embedder import MultilingualEmbedder
-from indexer import VectorIndex
+from indexer import VectorIndex, pack_texts, unpack_text
 from data_loader import DataLoader
 from config import DEFAULT_TOP_K, LANG_CODE_MAP
 
@@ -26,19 +28,29 @@ class CrossLingualRetriever:
         """
         self.embedder = embedder
         self.index = index
-        self.corpus_texts = None  # Will be loaded if needed
+        # Fallback texts for indexes saved without them, packed like the index's own
+        # (UTF-8 blob + byte offsets, see pack_texts)
+        self.corpus_text_blob = None
+        self.corpus_text_offsets = None
+        self._doc_id_lookup = None  # Object array of doc_ids, built on first id-only retrieval
+        # Display language per document as codes into a small name table, built on first use
+        self._language_names = None
+        self._language_name_codes = None
     
     def set_corpus_texts(self, corpus_texts: List[str]) -> None:
         """
         Set corpus texts for retrieving full document content.
         
+        Only needed for indexes saved without their texts. The texts are packed
+        into one UTF-8 buffer, so the caller's list can be released.
+        
         Args:
             corpus_texts: List of document texts corresponding to the index
         """
-        self.corpus_texts = corpus_texts
+        self.corpus_text_blob, self.corpus_text_offsets = pack_texts(corpus_texts)
     
     def retrieve(self, query: str, top_k: int = DEFAULT_TOP_K, 
-                 return_full_text: bool = False) -> List[Dict]:
+                 return_full_text: bool = False, snippet_chars: Optional[int] = None) -> List[Dict]:
         """
         Retrieve documents relevant to the query.
         
@@ -46,43 +58,164 @@ class CrossLingualRetriever:
             query: Query text (in any language, typically English)
             top_k: Number of documents to retrieve
             return_full_text: If True, include full document text in results
+            snippet_chars: If set, return only the first snippet_chars characters of
+                           each text (only that prefix is read from the index)
         
         Returns:
             List of result dictionaries with document information and scores
         """
         # Encode the query
         logger.info(f"Processing query: '{query}'")
-        query_embedding = self.embedder.encode_query(query)
+        query_embedding = self.embedder.encode_query(query, convert_to_tensor=self._device_queries)
         
-        # Search the index
+        return self.retrieve_by_embedding(query_embedding, top_k=top_k,
+                                          return_full_text=return_full_text,
+                                          snippet_chars=snippet_chars)
+    
+    def retrieve_by_embedding(self, query_embedding: np.ndarray, top_k: int = DEFAULT_TOP_K,
+                              return_full_text: bool = False,
+                              snippet_chars: Optional[int] = None) -> List[Dict]:
+        """
+        Retrieve documents for an already encoded query.
+        
+        Args:
+            query_embedding: Normalized query embedding (embedding_dim,)
+            top_k: Number of documents to retrieve
+            return_full_text: If True, include full document text in results
+            snippet_chars: If set, return only the first snippet_chars characters of
+                           each text (only that prefix is read from the index)
+        
+        Returns:
+            List of result dictionaries with document information and scores
+        """
         indices, scores = self.index.search(query_embedding, top_k=top_k)
         
-        # Format results
-        results = []
-        for rank, (idx, score) in enumerate(zip(indices, scores), 1):
-            doc_info = self.index.get_document_info(idx)
-            
-            # Extract language name from doc_id or metadata
-            lang_code = doc_info['doc_id'].split('#')[0]
-            language_name = LANG_CODE_MAP.get(lang_code, doc_info['language'])
-            
-            result = {
+        results = self._format_results(indices, scores, return_full_text, snippet_chars)
+        logger.info(f"Retrieved {len(results)} documents")
+        return results
+    
+    def retrieve_ids(self, query: str, top_k: int = DEFAULT_TOP_K) -> np.ndarray:
+        """
+        Retrieve only the ranked document IDs for a query.
+        
+        Args:
+            query: Query text
+            top_k: Number of documents to retrieve
+        
+        Returns:
+            Object array of doc_ids, best match first; slots beyond the available
+            hits are None
+        """
+        return self.batch_retrieve_ids([query], top_k=top_k)[0]
+    
+    def batch_retrieve_ids(self, queries: List[str], top_k: int = DEFAULT_TOP_K) -> np.ndarray:
+        """
+        Retrieve only the ranked document IDs for multiple queries.
+        
+        Args:
+            queries: List of query texts
+            top_k: Number of documents to retrieve per query
+        
+        Returns:
+            Object array of shape (n_queries, top_k) holding doc_ids; slots beyond
+            the available hits are None
+        """
+        if not queries:
+            return np.empty((0, top_k), dtype=object)
+        
+        query_embeddings = self.embedder.encode_queries(queries, convert_to_tensor=self._device_queries)
+        return self.retrieve_ids_by_embeddings(query_embeddings, top_k=top_k)
+    
+    def retrieve_ids_by_embeddings(self, query_embeddings: np.ndarray,
+                                   top_k: int = DEFAULT_TOP_K) -> np.ndarray:
+        """
+        Retrieve only the ranked document IDs for already encoded queries.
+        
+        Skips building result dictionaries, for callers such as the evaluator
+        that only need the ranking.
+        
+        Args:
+            query_embeddings: Normalized query embeddings (n_queries, embedding_dim)
+            top_k: Number of documents to retrieve per query
+        
+        Returns:
+            Object array of shape (n_queries, top_k) holding doc_ids; slots beyond
+            the available hits are None
+        """
+        all_indices, _ = self.index.batch_search(query_embeddings, top_k=top_k)
+        return self._lookup_doc_ids(all_indices)
+    
+    @property
+    def _device_queries(self) -> bool:
+        """Whether query embeddings can stay on the GPU all the way into the index search."""
+        return str(self.embedder.device).startswith('cuda') and self.index.accepts_device_queries
+    
+    def _lookup_doc_ids(self, indices: np.ndarray) -> np.ndarray:
+        """Map document indices to doc_ids with one fancy-indexing gather."""
+        doc_ids = self.index.doc_ids
+        if self._doc_id_lookup is None or len(self._doc_id_lookup) != len(doc_ids) + 1:
+            # Trailing None so that padding index -1 maps to no document
+            self._doc_id_lookup = np.empty(len(doc_ids) + 1, dtype=object)
+            self._doc_id_lookup[:-1] = doc_ids
+        return self._doc_id_lookup[indices]
+    
+    def _lookup_languages(self, indices: np.ndarray) -> np.ndarray:
+        """Map document indices to display language names with one gather."""
+        doc_ids = self.index.doc_ids
+        if self._language_name_codes is None or len(self._language_name_codes) != len(doc_ids):
+            # Language name from a doc_id prefix such as 'hi#...', else from the index
+            # metadata; the prefix check runs vectorized once instead of per hit
+            lang_vocab = self.index.metadata['lang_vocab']
+            names = list(lang_vocab) + list(LANG_CODE_MAP.values())
+            codes = self.index.lang_codes.astype(np.min_scalar_type(len(names) - 1))
+            for offset, lang_code in enumerate(LANG_CODE_MAP):
+                prefixed = np.char.startswith(doc_ids, lang_code + '#') | (doc_ids == lang_code)
+                codes[prefixed] = len(lang_vocab) + offset
+            self._language_names = np.array(names, dtype=object)
+            self._language_name_codes = codes
+        return self._language_names[self._language_name_codes[indices]]
+    
+    def _format_results(self, indices, scores, return_full_text: bool,
+                        snippet_chars: Optional[int] = None) -> List[Dict]:
+        """
+        Turn raw search hits into result dictionaries.
+        
+        Args:
+            indices: Ranked document indices from the index
+            scores: Similarity scores aligned with indices
+            return_full_text: If True, include full document text in results
+            snippet_chars: If set, truncate texts to this many characters
+        
+        Returns:
+            List of result dictionaries with document information and scores
+        """
+        # Gather doc_ids and language names for all hits at once; texts are only
+        # decoded when they are actually returned
+        indices = np.asarray(indices, dtype=np.int64)
+        doc_ids = self._lookup_doc_ids(indices).tolist()
+        languages = self._lookup_languages(indices).tolist()
+        
+        results = [
+            {
                 'rank': rank,
-                'doc_id': doc_info['doc_id'],
-                'language': language_name,
-                'score': float(score)
+                'doc_id': doc_id,
+                'language': language,
+                'score': score
             }
-            
-            # Add text if available in doc_info (from index) or from corpus_texts
-            if return_full_text:
-                if 'text' in doc_info:
-                    result['text'] = doc_info['text']
-                elif self.corpus_texts is not None and idx < len(self.corpus_texts):
-                    result['text'] = self.corpus_texts[idx]
-            
-            results.append(result)
+            for rank, (doc_id, language, score)
+            in enumerate(zip(doc_ids, languages, np.asarray(scores, dtype=np.float64).tolist()), 1)
+        ]
+        
+        # Add text if available in the index or from corpus_texts
+        if return_full_text:
+            for result, idx in zip(results, indices.tolist()):
+                text = self.index.get_text(idx, max_chars=snippet_chars)
+                if (text is None and self.corpus_text_offsets is not None
+                        and idx < len(self.corpus_text_offsets) - 1):
+                    text = unpack_text(self.corpus_text_blob, self.corpus_text_offsets, idx, snippet_chars)
+                if text is not None:
+                    result['text'] = text
         
-        logger.info(f"Retrieved {len(results)} documents")
         return results
     
     def print_results(self, results: List[Dict], max_text_length: int = 200) -> None:
@@ -93,35 +226,55 @@ class CrossLingualRetriever:
             results: List of result dictionaries from retrieve()
             max_text_length: Maximum length of text to display
         """
-        print(f"\n{'='*80}")
-        print(f"Retrieved {len(results)} documents")
-        print(f"{'='*80}\n")
+        # Collect all lines and write them in one call rather than one print per line
+        lines = [f"\n{'='*80}", f"Retrieved {len(results)} documents", f"{'='*80}\n"]
         
         for result in results:
-            print(f"Rank {result['rank']} (Score: {result['score']:.4f})")
-            print(f"  Document ID: {result['doc_id']}")
-            print(f"  Language: {result['language']}")
+            lines.append(f"Rank {result['rank']} (Score: {result['score']:.4f})")
+            lines.append(f"  Document ID: {result['doc_id']}")
+            lines.append(f"  Language: {result['language']}")
             
             if 'text' in result:
                 text = result['text'][:max_text_length].replace('\n', ' ')
-                print(f"  Content: {text}...")
+                lines.append(f"  Content: {text}...")
             
-            print(f"{'-'*80}")
+            lines.append(f"{'-'*80}")
+        
+        sys.stdout.write('\n'.join(lines) + '\n')
+        sys.stdout.flush()
     
-    def batch_retrieve(self, queries: List[str], top_k: int = DEFAULT_TOP_K) -> List[List[Dict]]:
+    def batch_retrieve(self, queries: List[str], top_k: int = DEFAULT_TOP_K,
+                       return_full_text: bool = False,
+                       snippet_chars: Optional[int] = None) -> List[List[Dict]]:
         """
         Retrieve documents for multiple queries.
         
+        All queries are encoded in one batched forward pass, which keeps the
+        GPU busy instead of paying one model call per query.
+        
         Args:
             queries: List of query texts
             top_k: Number of documents to retrieve per query
+            return_full_text: If True, include full document text in results
+            snippet_chars: If set, return only the first snippet_chars characters of
+                           each text (only that prefix is read from the index)
         
         Returns:
             List of result lists, one per query
         """
+        if not queries:
+            return []
+        
+        logger.info(f"Processing batch of {len(queries)} queries")
+        query_embeddings = self.embedder.encode_queries(queries, convert_to_tensor=self._device_queries)
+        
+        # Score all queries against the index in one batched search
+        all_indices, all_scores = self.index.batch_search(query_embeddings, top_k=top_k)
+        
         all_results = []
-        for query in queries:
-            results = self.retrieve(query, top_k=top_k)
-            all_results.append(results)
+        for indices, scores in zip(all_indices, all_scores):
+            found = indices >= 0
+            all_results.append(self._format_results(indices[found], scores[found], return_full_text,
+                                                    snippet_chars))
         
         return all_results
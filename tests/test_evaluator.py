@@ -0,0 +1,69 @@
+"""
+Tests for the nDCG@k and Recall@k metrics.
+
+Run with: python -m pytest tests  (or python -m unittest discover tests)
+"""
+
+import math
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# evaluator imports ir_datasets for loading MIRACL
+try:
+    from evaluator import calculate_ndcg_at_k, calculate_recall_at_k
+    EVALUATOR_AVAILABLE = True
+except ImportError:
+    EVALUATOR_AVAILABLE = False
+
+
+@unittest.skipUnless(EVALUATOR_AVAILABLE, "evaluator dependencies not installed")
+class MetricsTest(unittest.TestCase):
+    """Metric values against hand-computed references (binary relevance)."""
+
+    def test_ndcg_k_above_num_relevant(self):
+        # Hits at ranks 1 and 3; the ideal ranking has both relevant docs first
+        dcg = 1 / math.log2(2) + 1 / math.log2(4)
+        idcg = 1 / math.log2(2) + 1 / math.log2(3)
+        ndcg = calculate_ndcg_at_k(['a', 'x', 'b', 'y'], frozenset({'a', 'b'}), k=10)
+        self.assertAlmostEqual(ndcg, dcg / idcg)
+        self.assertAlmostEqual(ndcg, 0.9197207891481876)
+
+    def test_ndcg_cutoff(self):
+        # The only hit is at rank 2, beyond k=1
+        self.assertEqual(calculate_ndcg_at_k(['x', 'a'], frozenset({'a'}), k=1), 0.0)
+        # Single relevant doc at rank 2 with k=2: 1 / log2(3)
+        self.assertAlmostEqual(calculate_ndcg_at_k(['x', 'a'], frozenset({'a'}), k=2),
+                               1 / math.log2(3))
+
+    def test_perfect_ranking(self):
+        self.assertAlmostEqual(calculate_ndcg_at_k(['a', 'b', 'c'], frozenset({'a', 'b'}), k=10), 1.0)
+        self.assertAlmostEqual(calculate_recall_at_k(['a', 'b', 'c'], frozenset({'a', 'b'}), k=100), 1.0)
+
+    def test_recall(self):
+        relevant = frozenset({'a', 'b', 'c', 'd'})
+        self.assertAlmostEqual(calculate_recall_at_k(['a', 'x', 'c'], relevant, k=100), 0.5)
+        # 'c' falls beyond the cutoff
+        self.assertAlmostEqual(calculate_recall_at_k(['a', 'x', 'c'], relevant, k=2), 0.25)
+
+    def test_empty_ranking(self):
+        self.assertEqual(calculate_ndcg_at_k([], frozenset({'a'}), k=10), 0.0)
+        self.assertEqual(calculate_recall_at_k([], frozenset({'a'}), k=100), 0.0)
+
+    def test_no_relevant_documents(self):
+        self.assertEqual(calculate_ndcg_at_k(['a'], frozenset(), k=10), 0.0)
+        self.assertEqual(calculate_recall_at_k(['a'], frozenset(), k=100), 0.0)
+
+    def test_none_padding(self):
+        # batch rankings pad missing hits with None; padding never counts as a hit
+        ranking = ['a', None, None]
+        relevant = frozenset({'a', 'b'})
+        self.assertAlmostEqual(calculate_ndcg_at_k(ranking, relevant, k=10),
+                               1 / (1 + 1 / math.log2(3)))
+        self.assertAlmostEqual(calculate_recall_at_k(ranking, relevant, k=100), 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
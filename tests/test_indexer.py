@@ -0,0 +1,234 @@
+"""
+Tests for the NumPy search path of VectorIndex.
+
+Run with: python -m pytest tests  (or python -m unittest discover tests)
+"""
+
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import indexer  # noqa: E402
+from indexer import VectorIndex  # noqa: E402
+
+
+def _random_embeddings(num_docs: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Unit-norm random embeddings."""
+    embeddings = np.random.default_rng(seed).standard_normal((num_docs, dim)).astype(np.float32)
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+
+def _build_index(index_dir: Path, embeddings: np.ndarray, **kwargs) -> VectorIndex:
+    """Build a NumPy-backend index over the embeddings with dummy metadata."""
+    num_docs = len(embeddings)
+    index = VectorIndex(index_dir=index_dir, backend='numpy', **kwargs)
+    index.build(embeddings, [f"hi#{i}" for i in range(num_docs)], ['hindi'] * num_docs)
+    return index
+
+
+class BatchSearchTest(unittest.TestCase):
+    """Blocked batch search returns exactly the brute-force ranking."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        # Entries of +-0.25 over 16 dims: exactly unit norm, and every inner product
+        # is a multiple of 1/16, so scores are exact and ties are plentiful
+        signs = np.random.default_rng(1).choice([-1.0, 1.0], size=(1000, 16))
+        self.embeddings = (0.25 * signs).astype(np.float32)
+        self.queries = self.embeddings[[0, 17, 64, 500, 999]]
+        self.index = _build_index(Path(self.tmp_dir.name), self.embeddings)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def assert_matches_brute_force(self, indices, scores, top_k):
+        exact = self.queries @ self.embeddings.T
+        expected_scores = -np.sort(-exact, axis=1)[:, :top_k]
+        self.assertEqual(indices.shape, (len(self.queries), top_k))
+        np.testing.assert_array_equal(scores, expected_scores)
+        for row in range(len(self.queries)):
+            # Any order among tied documents is correct, but each hit must be a
+            # distinct document carrying its true score
+            self.assertEqual(len(set(indices[row].tolist())), top_k)
+            np.testing.assert_array_equal(exact[row, indices[row]], scores[row])
+
+    def test_blocks_match_brute_force(self):
+        # 64-row blocks: the corpus spans 16 blocks, the last one partial
+        with mock.patch.object(indexer, 'SEARCH_BLOCK_SIZE', 64):
+            for top_k in (1, 10, 100):
+                indices, scores = self.index.batch_search(self.queries, top_k=top_k)
+                self.assert_matches_brute_force(indices, scores, top_k)
+
+    def test_top_k_above_corpus_size(self):
+        with mock.patch.object(indexer, 'SEARCH_BLOCK_SIZE', 64):
+            indices, scores = self.index.batch_search(self.queries, top_k=5000)
+        self.assert_matches_brute_force(indices, scores, len(self.embeddings))
+        for row in indices:
+            np.testing.assert_array_equal(np.sort(row), np.arange(len(self.embeddings)))
+
+
+class QuantizedSearchTest(unittest.TestCase):
+    """int8 and binary search, rescored after a save/load roundtrip, track the float index."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        # 60 clusters of 50 documents; 3000 documents exceed INT8_RESCORE_CANDIDATES,
+        # so the int8 pre-pass really has to select candidates
+        rng = np.random.default_rng(2)
+        centers = rng.standard_normal((60, 64))
+        embeddings = np.repeat(centers, 50, axis=0) + 0.6 * rng.standard_normal((3000, 64))
+        self.embeddings = (embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)).astype(np.float32)
+        queries = self.embeddings[::150] + 0.05 * rng.standard_normal((20, 64))
+        self.queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+        self.reference = _build_index(Path(self.tmp_dir.name) / 'float', self.embeddings)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def assert_recall(self, quantization: str):
+        index_dir = Path(self.tmp_dir.name) / quantization
+        _build_index(index_dir, self.embeddings, quantization=quantization).save()
+        index = VectorIndex(index_dir=index_dir, backend='numpy')
+        self.assertTrue(index.load())
+        self.assertEqual(index.quantization, quantization)
+
+        recalls = []
+        for query in self.queries:
+            indices, scores = index.search(query, top_k=10)
+            expected, _ = self.reference.search(query, top_k=10)
+            recalls.append(len(set(indices.tolist()) & set(expected.tolist())) / 10)
+            # Rescored hits carry their float scores (stored as float16)
+            np.testing.assert_allclose(scores, self.embeddings[indices] @ query, atol=2e-3)
+        self.assertGreaterEqual(np.mean(recalls), 0.9)
+
+    def test_int8_recall(self):
+        self.assert_recall('int8')
+
+    def test_binary_recall(self):
+        self.assert_recall('binary')
+
+
+class TextStorageTest(unittest.TestCase):
+    """Document texts packed as one UTF-8 blob, and loading of legacy indexes."""
+
+    TEXTS = [
+        'नमस्ते दुनिया, यह एक परीक्षण है',  # Hindi: 3-byte characters, combining marks
+        'తెలుగు భాష చాలా అందమైనది',  # Telugu
+        'mixed हिंदी and ASCII 😀 (4-byte)',
+        '',
+        'plain ASCII text',
+    ]
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.index_dir = Path(self.tmp_dir.name)
+        self.embeddings = _random_embeddings(len(self.TEXTS), 16)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def assert_texts(self, index: VectorIndex):
+        for i, text in enumerate(self.TEXTS):
+            self.assertEqual(index.get_text(i), text)
+            # Every prefix length decodes to whole code points, never a split one
+            for max_chars in range(len(text) + 2):
+                self.assertEqual(index.get_text(i, max_chars=max_chars), text[:max_chars])
+        self.assertIsNone(index.get_text(len(self.TEXTS)))
+
+    def test_get_text_roundtrip(self):
+        num_docs = len(self.TEXTS)
+        index = VectorIndex(index_dir=self.index_dir, backend='numpy')
+        index.build(self.embeddings, [f"hi#{i}" for i in range(num_docs)], ['hindi'] * num_docs,
+                    self.TEXTS)
+        self.assert_texts(index)
+        index.save()
+
+        loaded = VectorIndex(index_dir=self.index_dir, backend='numpy')
+        self.assertTrue(loaded.load())
+        self.assert_texts(loaded)
+
+    def test_load_legacy_index(self):
+        # Layout written by the original save(): compressed float32 embeddings, and
+        # doc_ids, languages and texts as JSON lists in the metadata
+        np.savez_compressed(self.index_dir / indexer.INDEX_FILENAME, embeddings=self.embeddings)
+        doc_ids = [f"doc{i}" for i in range(len(self.TEXTS))]
+        languages = ['hindi', 'telugu', 'hindi', 'bengali', 'telugu']
+        metadata = {
+            'doc_ids': doc_ids,
+            'languages': languages,
+            'doc_texts': self.TEXTS,
+            'num_documents': len(doc_ids),
+            'embedding_dim': self.embeddings.shape[1],
+            'backend': 'numpy'
+        }
+        with open(self.index_dir / indexer.METADATA_FILENAME, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False)
+
+        index = VectorIndex(index_dir=self.index_dir, backend='numpy')
+        self.assertTrue(index.load())
+        self.assertEqual(index.doc_ids.tolist(), doc_ids)
+        self.assertEqual([index.get_document_info(i)['language'] for i in range(len(doc_ids))], languages)
+        self.assert_texts(index)
+
+        indices, _ = index.search(self.embeddings[2], top_k=1)
+        self.assertEqual(indices.tolist(), [2])
+
+
+@unittest.skipUnless(indexer.NUMBA_AVAILABLE, "numba not installed")
+class FusedTopKTest(unittest.TestCase):
+    """The Numba top-k kernel serves indexes loaded from disk (float16 storage)."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.index_dir = Path(self.tmp_dir.name)
+        self.embeddings = _random_embeddings(300, 32)
+        num_docs = len(self.embeddings)
+        index = VectorIndex(index_dir=self.index_dir, backend='numpy')
+        index.build(self.embeddings, [f"hi#{i}" for i in range(num_docs)], ['hindi'] * num_docs)
+        index.save()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_loaded_index_uses_kernel(self):
+        index = VectorIndex(index_dir=self.index_dir, backend='numpy')
+        self.assertTrue(index.load())
+        self.assertEqual(index.embeddings.dtype, np.float16)
+
+        query = self.embeddings[7]
+        with mock.patch.object(indexer, 'topk_dot', wraps=indexer.topk_dot) as kernel:
+            indices, scores = index.search(query, top_k=5)
+        kernel.assert_called_once()
+
+        expected = np.argsort(-(np.asarray(index.embeddings, dtype=np.float32) @ query))[:5]
+        np.testing.assert_array_equal(indices, expected)
+        self.assertEqual(indices[0], 7)
+        self.assertTrue(np.all(np.diff(scores) <= 0))
+
+    def test_float16_blocks_match_float32(self):
+        embeddings = self.embeddings.astype(np.float16)
+        query = np.ascontiguousarray(self.embeddings[42])
+        # Several blocks, the last one partial
+        indices, scores = indexer.topk_dot(embeddings, query, 10, block_size=64)
+
+        exact = embeddings.astype(np.float32) @ query
+        np.testing.assert_array_equal(indices, np.argsort(-exact)[:10])
+        np.testing.assert_allclose(scores, exact[indices], rtol=1e-5)
+
+    def test_zero_top_k(self):
+        index = VectorIndex(index_dir=self.index_dir, backend='numpy')
+        self.assertTrue(index.load())
+        indices, scores = index.search(self.embeddings[0], top_k=0)
+        self.assertEqual(len(indices), 0)
+        self.assertEqual(len(scores), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()